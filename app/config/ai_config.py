@@ -4,7 +4,8 @@ from enum import Enum
 from functools import lru_cache
 from typing import Dict, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class CombinationMethod(str, Enum):
@@ -17,6 +18,8 @@ class CombinationMethod(str, Enum):
 class OpenAIConfig(BaseModel):
     """OpenAI-specific configuration."""
 
+    model_config = ConfigDict(frozen=True)
+
     model: str = Field(default="gpt-4o-mini", description="Model to use for chat completions")
     temperature: float = Field(default=0.7, ge=0.0, le=2.0, description="Sampling temperature for response generation")
     max_tokens: int = Field(default=500, gt=0, description="Maximum number of tokens in the response")
@@ -29,6 +32,8 @@ class OpenAIConfig(BaseModel):
 class RetrieverConfig(BaseModel):
     """Configuration for retrieval systems."""
 
+    model_config = ConfigDict(frozen=True)
+
     top_k: int = Field(default=4, gt=0, description="Number of documents to retrieve")
     combination_method: CombinationMethod = Field(
         default=CombinationMethod.RRF, description="Method to combine results from different retrievers"
@@ -43,48 +48,89 @@ class RetrieverConfig(BaseModel):
     min_score_threshold: float = Field(
         default=0.001, ge=0.0, le=1.0, description="Minimum score threshold for retrieved documents"
     )
+    search_cache_size: int = Field(
+        default=256, ge=0, description="Number of search results cached per retriever (0 disables caching)"
+    )
+    bm25_k1: float = Field(default=1.5, ge=0.0, description="BM25 term frequency saturation parameter")
+    bm25_b: float = Field(default=0.75, ge=0.0, le=1.0, description="BM25 document length normalization parameter")
 
-    class Config:
-        """Pydantic config for validation."""
-
-        @classmethod
-        def validate_weights(cls, values):
-            """Validate that weights are properly configured."""
-            if (
-                values.get("combination_method") == CombinationMethod.WEIGHTED
-                and values.get("vector_weight", 0) + values.get("bm25_weight", 0) <= 0
-            ):
-                raise ValueError("At least one weight must be greater than 0 when using weighted average")
-            return values
+    @model_validator(mode="after")
+    def validate_weights(self) -> "RetrieverConfig":
+        """Validate that weights are properly configured."""
+        if self.combination_method == CombinationMethod.WEIGHTED and self.vector_weight + self.bm25_weight <= 0:
+            raise ValueError("At least one weight must be greater than 0 when using weighted average")
+        return self
 
 
 class EmbeddingsConfig(BaseModel):
     """Embeddings model configuration."""
 
+    model_config = ConfigDict(frozen=True)
+
     model_name: str = Field(default="all-MiniLM-L6-v2", description="Model name for embeddings")
     device: str = Field(default="cpu", description="Device to use for embeddings (cpu/cuda)")
+    backend: Literal["torch", "onnx", "openvino"] = Field(
+        default="torch", description="Inference backend for the in-process embedding model"
+    )
+    model_file: str | None = Field(
+        default=None,
+        description="Exported model file for the onnx/openvino backend (e.g. onnx/model_qint8_avx2.onnx for int8)",
+    )
+    tei_url: str | None = Field(
+        default=None, description="Text-Embeddings-Inference server URL; embeds in-process when unset"
+    )
+    batch_size: int = Field(
+        default=64, gt=0, description="Number of texts embedded per forward pass (or per TEI request) on bulk add"
+    )
+    max_concurrency: int = Field(
+        default=2, gt=0, description="Maximum number of embedding calls running at once in worker threads"
+    )
+    document_cache: bool = Field(
+        default=True, description="Persist document embeddings by content hash so identical content is embedded once"
+    )
+    document_cache_size: int = Field(
+        default=100_000, gt=0, description="Maximum number of cached document embeddings; the oldest are evicted first"
+    )
+    query_cache_size: int = Field(
+        default=1024, ge=0, description="Number of query embeddings cached by the vector retriever (0 disables)"
+    )
 
 
 class ChromaConfig(BaseModel):
     """Chroma vector store configuration."""
 
+    model_config = ConfigDict(frozen=True)
+
     collection_name: str = Field(default="notes", description="Name of the vector store collection")
+    hnsw_m: int = Field(default=32, gt=0, description="HNSW graph degree, applied when the collection is created")
+    hnsw_construction_ef: int = Field(
+        default=200,
+        gt=0,
+        description="HNSW candidate list size while inserting, applied when the collection is created",
+    )
+    hnsw_search_ef: int = Field(default=64, gt=0, description="HNSW candidate list size while searching")
+    exact_search: bool = Field(
+        default=False,
+        description="Search an in-memory copy of all vectors exactly instead of walking HNSW (small collections)",
+    )
 
 
-class AIConfig(BaseModel):
+class AIConfig(BaseSettings):
     """Main AI configuration container."""
 
+    model_config = SettingsConfigDict(
+        env_prefix="AI_",  # Environment variables prefix
+        env_nested_delimiter="__",  # Use double underscore for nested config
+        env_file=".env",
+        extra="ignore",
+        frozen=True,  # Shared singleton behind get_ai_config(), never mutated
+    )
+
     openai: OpenAIConfig = Field(default_factory=OpenAIConfig)
     retriever: RetrieverConfig = Field(default_factory=RetrieverConfig)
     embeddings: EmbeddingsConfig = Field(default_factory=EmbeddingsConfig)
     chroma: ChromaConfig = Field(default_factory=ChromaConfig)
 
-    class Config:
-        """Pydantic config."""
-
-        env_prefix = "AI_"  # Environment variables prefix
-        env_nested_delimiter = "__"  # Use double underscore for nested config
-
 
 @lru_cache
 def get_ai_config() -> AIConfig:
@@ -98,6 +144,8 @@ def get_ai_config() -> AIConfig:
         AI_RETRIEVER__COMBINATION_METHOD=weighted will use weighted average
         AI_RETRIEVER__VECTOR_WEIGHT=0.8 will set vector weight to 0.8
         AI_EMBEDDINGS__DEVICE=cuda will use GPU for embeddings
+        AI_EMBEDDINGS__BACKEND=onnx will embed with ONNX Runtime instead of PyTorch
+        AI_EMBEDDINGS__TEI_URL=http://tei:80 will embed through a TEI server
 
     Returns:
         AIConfig: Configuration instance
@@ -1,5 +1,15 @@
 """Prompt templates for various AI tasks."""
 
+ANSWER_PROMPT = """Based on the following contexts, answer the query. If the contexts don't contain relevant information answer to the best of your ability but tell the user that you couldn't find relevant information.
+
+Contexts:
+{contexts}
+
+Query: {query}
+
+Please provide a clear and concise response using the information from the given contexts and if you don't have relevant information answer to the best of your ability but tell the user that you couldn't find relevant information."""
+
+
 RELEVANCY_CHECK_PROMPT = """Analyze if the response is both relevant to the query and supported by at least some of the given contexts.
 Do not explain, just output a single word: 'yes' or 'no'.
 
@@ -1,27 +1,17 @@
 """Application settings."""
 
-import os
 from functools import lru_cache
 from pathlib import Path
 
-from dotenv import load_dotenv
-from pydantic_settings import BaseSettings
-
-# Load environment variables from .env file
-load_dotenv()
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # Base directories
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
-# Environment
-ENV = os.getenv("ENV", "development")
-DEBUG = os.getenv("DEBUG", "true").lower() == "true"
-
 # Database
 DEFAULT_DB_URL = f"sqlite+aiosqlite:///{DATA_DIR}/notes.db"
-DATABASE_URL = os.getenv("DATABASE_URL", DEFAULT_DB_URL)
 
 # API configuration
 API_V1_PREFIX = "/api/v1"
@@ -29,21 +19,25 @@ API_V1_PREFIX = "/api/v1"
 # Vector store settings
 VECTOR_STORE_DIR = DATA_DIR / "vector_store"
 VECTOR_STORE_DIR.mkdir(exist_ok=True)
+EMBEDDING_CACHE_PATH = DATA_DIR / "embedding_cache.db"
 
 
 class Settings(BaseSettings):
-    """Application settings."""
+    """Application settings, read from the environment and the .env file."""
 
-    DATABASE_URL: str = DATABASE_URL
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        extra="ignore",  # .env also holds variables for other tools (e.g. AI_* overrides)
+        frozen=True,  # Shared singleton behind get_settings(), never mutated
+    )
+
+    ENV: str = "development"
+    DEBUG: bool = True
+    DATABASE_URL: str = DEFAULT_DB_URL
     VECTOR_STORE_DIR: Path = VECTOR_STORE_DIR
+    EMBEDDING_CACHE_PATH: Path = EMBEDDING_CACHE_PATH
     OPENAI_API_KEY: str | None = None
 
-    class Config:
-        """Pydantic config."""
-
-        env_file = ".env"
-        extra = "allow"  # Allow extra fields from environment
-
 
 @lru_cache
 def get_settings() -> Settings:
@@ -54,3 +48,8 @@ def get_settings() -> Settings:
         Settings: Application settings instance
     """
     return Settings()
+
+
+# Environment
+ENV = get_settings().ENV
+DEBUG = get_settings().DEBUG
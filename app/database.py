@@ -1,3 +1,6 @@
+from uuid import UUID
+
+from sqlalchemy import Connection, event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -7,7 +10,26 @@ settings = get_settings()
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    # Wait on a locked database instead of failing immediately under concurrent writes
+    connect_args={"check_same_thread": False, "timeout": 30} if IS_SQLITE else {},
+)
+
+if IS_SQLITE:
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        """Enable WAL so readers don't block the writer, and relax fsyncs to once per checkpoint."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
 
@@ -17,9 +39,31 @@ class Base(DeclarativeBase):
 
 
 async def init_db() -> None:
-    """Initialize database tables."""
+    """Initialize database tables and convert note ids written by older versions."""
     # Import models here to ensure they are registered with Base
     from .models import Note  # noqa: F401
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        if IS_SQLITE:
+            await conn.run_sync(convert_legacy_note_ids)
+
+
+def convert_legacy_note_ids(connection: Connection) -> int:
+    """
+    Convert note ids stored as 32-character hex strings to 16-byte blobs, in place.
+
+    Older versions stored UUIDs as hex text on SQLite; lookups now bind blobs and would miss those rows.
+
+    Args:
+        connection: Connection inside the transaction doing the conversion
+
+    Returns:
+        int: Number of converted notes
+    """
+    rows = connection.exec_driver_sql("SELECT id FROM notes WHERE typeof(id) = 'text'").fetchall()
+    if rows:
+        connection.exec_driver_sql(
+            "UPDATE notes SET id = ? WHERE id = ?", [(UUID(hex_id).bytes, hex_id) for (hex_id,) in rows]
+        )
+    return len(rows)
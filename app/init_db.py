@@ -0,0 +1,8 @@
+"""Create database tables. Run once per deployment with `python -m app.init_db`."""
+
+import asyncio
+
+from .database import init_db
+
+if __name__ == "__main__":
+    asyncio.run(init_db())
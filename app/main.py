@@ -1,14 +1,36 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .config import API_V1_PREFIX
-from .database import init_db
+from .config import API_V1_PREFIX, ENV
+from .database import async_session, init_db
 from .routes import notes
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Application lifespan.
+
+    Tables are created on startup only in development; deployments create them once
+    with `python -m app.init_db` instead of on every process start. The in-memory BM25
+    index is rebuilt from the database on every start.
+    """
+    if ENV == "development":
+        await init_db()
+    note_service = await notes.get_note_service()
+    async with async_session() as db:
+        await note_service.load_keyword_index(db)
+    yield
+
+
 app = FastAPI(
     title="Memory Note App",
     description="A note-taking application with semantic search capabilities",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -21,11 +43,5 @@ app.add_middleware(
 )
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup."""
-    await init_db()
-
-
 # Include routers
 app.include_router(notes.router, prefix=API_V1_PREFIX)
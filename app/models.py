@@ -1,18 +1,49 @@
 from datetime import datetime
 from uuid import UUID, uuid4
 
-from sqlalchemy import DateTime, String, Text
+from sqlalchemy import DateTime, LargeBinary, String, Text, TypeDecorator, Uuid
+from sqlalchemy.engine import Dialect
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 
 from .database import Base
 
 
+class BinaryUUID(TypeDecorator):
+    """
+    UUID column stored compactly on every backend.
+
+    Uses the native UUID type where the database has one (e.g. PostgreSQL) and a 16-byte BLOB
+    elsewhere, instead of SQLAlchemy's 32-character hex string fallback on SQLite.
+    """
+
+    impl = Uuid
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect: Dialect):
+        if dialect.supports_native_uuid:
+            return dialect.type_descriptor(Uuid())
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value: UUID | None, dialect: Dialect):
+        if value is None or dialect.supports_native_uuid:
+            return value
+        return value.bytes
+
+    def process_result_value(self, value, dialect: Dialect) -> UUID | None:
+        if value is None or dialect.supports_native_uuid:
+            return value
+        if isinstance(value, str):
+            # Hex string written before ids were stored as blobs; init_db converts these
+            return UUID(value)
+        return UUID(bytes=value)
+
+
 class Note(Base):
     """SQLAlchemy model representing a note in the system."""
 
     __tablename__ = "notes"
-    id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
+    id: Mapped[UUID] = mapped_column(BinaryUUID, primary_key=True, default=uuid4)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -2,7 +2,17 @@
 
 from .base import BaseRetriever, SearchResult
 from .bm25 import BM25Retriever
-from .combined import CombinedRetriever
+from .combined import CombinedRetriever, get_combined_retriever
+from .registry import clear_registry, get_retriever
 from .vector import VectorRetriever
 
-__all__ = ["BaseRetriever", "BM25Retriever", "CombinedRetriever", "VectorRetriever", "SearchResult"]
+__all__ = [
+    "BaseRetriever",
+    "BM25Retriever",
+    "CombinedRetriever",
+    "VectorRetriever",
+    "SearchResult",
+    "clear_registry",
+    "get_combined_retriever",
+    "get_retriever",
+]
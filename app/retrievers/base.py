@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, TypedDict
+from typing import List, Tuple, TypedDict
 
 
 class SearchResult(TypedDict):
@@ -13,11 +13,19 @@ class SearchResult(TypedDict):
 class BaseRetriever(ABC):
     """Base class for all retrievers."""
 
+    # Incremented on every write so derived state (e.g. cached search results) can be invalidated
+    corpus_version: int = 0
+
     @abstractmethod
     async def add_document(self, content: str, metadata: dict) -> None:
         """Add a document to the retriever."""
         pass
 
+    async def add_documents(self, documents: List[Tuple[str, dict]]) -> None:
+        """Add several (content, metadata) documents; retrievers override this when batching is cheaper."""
+        for content, metadata in documents:
+            await self.add_document(content, metadata)
+
     @abstractmethod
     async def search(self, query: str, k: int = 4) -> List[SearchResult]:
         """Search for documents."""
@@ -1,23 +1,45 @@
-from typing import Dict, List
+import asyncio
+import math
+import string
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
 import numpy as np
-from rank_bm25 import BM25Okapi
 
 from ..config.ai_config import get_ai_config
 from .base import BaseRetriever, SearchResult
+from .cache import SearchCache
 
 ai_config = get_ai_config()
 
+# Maps ASCII punctuation to spaces so it never sticks to a token ("networks." -> "networks")
+_PUNCTUATION_TABLE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+
 
 class BM25Retriever(BaseRetriever):
-    """BM25 retriever implementation."""
+    """BM25 retriever implementation backed by an incrementally maintained index."""
 
     def __init__(self):
         """Initialize BM25 retriever."""
         self.documents: List[str] = []
         self.metadata: List[Dict] = []
-        self.bm25: BM25Okapi | None = None
+        # Index state, updated in O(document length) on every add/delete; guarded by _lock because
+        # scoring runs in a worker thread
+        self._lock = threading.Lock()
+        # Tokens are interned into integer ids; each document keeps (term ids, term frequencies) int32 arrays
+        self._vocab: Dict[str, int] = {}
+        self._doc_terms: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._postings: Dict[int, Dict[int, int]] = {}
+        self._doc_lens: np.ndarray = np.zeros(0, dtype=np.float32)
+        self._total_len: int = 0
+        # Corpus position of each note, so a delete finds its document without scanning the metadata
+        self._positions: Dict[str, int] = {}
+        self._search_cache = SearchCache(ai_config.retriever.search_cache_size)
 
-    def _tokenize(self, text: str) -> List[str]:
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
         """
         Tokenize text for BM25.
 
@@ -27,29 +49,148 @@ class BM25Retriever(BaseRetriever):
         Returns:
             List[str]: List of tokens
         """
-        return text.lower().split()
+        return text.lower().translate(_PUNCTUATION_TABLE).split()
+
+    @staticmethod
+    @lru_cache(maxsize=2048)
+    def _tokenize_query(query: str) -> Tuple[str, ...]:
+        """
+        Tokenize a search query, memoised since queries tend to repeat.
+
+        Args:
+            query: Query to tokenize
+
+        Returns:
+            Tuple[str, ...]: Immutable tuple of tokens, safe to share between calls
+        """
+        return tuple(BM25Retriever._tokenize(query))
 
-    def _normalize_scores(self, scores: np.ndarray) -> np.ndarray:
+    def _normalize_scores(self, scores: np.ndarray, max_score: float) -> np.ndarray:
         """
         Normalize BM25 scores to [0, 1] range.
 
         Args:
-            scores: Raw BM25 scores
+            scores: Raw BM25 scores (non-negative)
+            max_score: Maximum of the raw scores
 
         Returns:
             np.ndarray: Normalized scores
         """
-        if len(scores) == 0 or np.all(scores == 0):
+        if scores.size == 0 or max_score == 0:
             return scores
-        return scores / np.max(scores)
+        return scores / max_score
+
+    def _encode(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Map tokens to vocabulary ids, extending the vocabulary with unseen tokens.
+
+        Args:
+            tokens: Document tokens
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Distinct term ids and their frequencies, both int32
+        """
+        counts = Counter(tokens)
+        vocab = self._vocab
+        term_ids = np.fromiter((vocab.setdefault(t, len(vocab)) for t in counts), dtype=np.int32, count=len(counts))
+        tfs = np.fromiter(counts.values(), dtype=np.int32, count=len(counts))
+        return term_ids, tfs
+
+    def _index_document(self, idx: int, term_ids: np.ndarray, tfs: np.ndarray) -> None:
+        """
+        Add a document's terms and length to the index.
+
+        Args:
+            idx: Position of the document in the corpus
+            term_ids: Distinct term ids of the document
+            tfs: Frequency of each term in the document
+        """
+        for term, tf in zip(term_ids.tolist(), tfs.tolist()):
+            # get() + branch avoids setdefault's throwaway empty dict for already-known terms
+            postings = self._postings.get(term)
+            if postings is None:
+                self._postings[term] = {idx: tf}
+            else:
+                postings[idx] = tf
+
+        doc_len = int(tfs.sum())
+        if idx >= len(self._doc_lens):
+            # Grow geometrically so appends stay amortized O(1)
+            self._doc_lens = np.concatenate(
+                [self._doc_lens, np.zeros(max(idx + 1, 2 * len(self._doc_lens)), dtype=np.float32)]
+            )
+        self._doc_lens[idx] = doc_len
+        self._total_len += doc_len
+
+    def _unindex_document(self, idx: int) -> None:
+        """
+        Remove a document's terms and length from the index.
 
-    def _update_index(self) -> None:
-        """Update BM25 index with current documents."""
-        if self.documents:
-            tokenized_docs = [self._tokenize(doc) for doc in self.documents]
-            self.bm25 = BM25Okapi(tokenized_docs)
-        else:
-            self.bm25 = None
+        Args:
+            idx: Position of the document in the corpus
+        """
+        for term in self._doc_terms[idx][0].tolist():
+            postings = self._postings[term]
+            del postings[idx]
+            if not postings:
+                del self._postings[term]
+        self._total_len -= int(self._doc_lens[idx])
+
+    def _move_document(self, src: int, dst: int) -> None:
+        """
+        Move an indexed document to another (free) position.
+
+        Args:
+            src: Current position of the document
+            dst: New position of the document
+        """
+        for term in self._doc_terms[src][0].tolist():
+            postings = self._postings[term]
+            postings[dst] = postings.pop(src)
+        self._doc_lens[dst] = self._doc_lens[src]
+        self.documents[dst] = self.documents[src]
+        self.metadata[dst] = self.metadata[src]
+        self._doc_terms[dst] = self._doc_terms[src]
+        self._positions[self.metadata[dst].get("note_id")] = dst
+
+    def get_scores(self, tokenized_query: Tuple[str, ...]) -> np.ndarray:
+        """
+        Compute raw BM25 scores of every document for a tokenized query.
+
+        Args:
+            tokenized_query: Query tokens
+
+        Returns:
+            np.ndarray: float32 score per document, in corpus order
+        """
+        n_docs = len(self.documents)
+        # float32 is ample for ranking and halves memory traffic; Python-float constants keep it float32
+        scores = np.zeros(n_docs, dtype=np.float32)
+        if n_docs == 0 or self._total_len == 0:
+            return scores
+
+        k1 = ai_config.retriever.bm25_k1
+        b = ai_config.retriever.bm25_b
+        doc_lens = self._doc_lens[:n_docs]
+        avgdl = self._total_len / n_docs
+        # Fold the constants of the length normalization k1 * (1 - b + b * dl / avgdl) once per query
+        norm_base = k1 * (1 - b)
+        norm_slope = k1 * b / avgdl
+
+        for token in tokenized_query:
+            term = self._vocab.get(token)
+            postings = self._postings.get(term) if term is not None else None
+            if not postings:
+                continue
+
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            doc_ids = np.fromiter(postings.keys(), dtype=np.intp, count=df)
+            tfs = np.fromiter(postings.values(), dtype=np.float32, count=df)
+            # Each document appears at most once per posting list, so plain fancy-index add is safe
+            scores[doc_ids] += (idf * (k1 + 1)) * tfs / (tfs + (norm_base + norm_slope * doc_lens[doc_ids]))
+
+        return scores
 
     async def add_document(self, content: str, metadata: dict) -> None:
         """
@@ -59,9 +200,36 @@ class BM25Retriever(BaseRetriever):
             content: Document content
             metadata: Document metadata
         """
-        self.documents.append(content)
-        self.metadata.append(metadata)
-        self._update_index()
+        await self.add_documents([(content, metadata)])
+
+    async def add_documents(self, documents: List[Tuple[str, dict]]) -> None:
+        """
+        Add several documents under a single lock acquisition.
+
+        Args:
+            documents: (content, metadata) pairs
+        """
+        # The lock may be held by a search scoring in a worker thread, so never wait for it on the event loop
+        await asyncio.to_thread(self._add_sync, documents)
+
+    def _add_sync(self, documents: List[Tuple[str, dict]]) -> None:
+        """
+        Tokenize and index documents; runs in a worker thread.
+
+        Args:
+            documents: (content, metadata) pairs
+        """
+        tokenized = [(content, metadata, self._tokenize(content)) for content, metadata in documents]
+        with self._lock:
+            for content, metadata, tokens in tokenized:
+                term_ids, tfs = self._encode(tokens)
+                idx = len(self.documents)
+                self.documents.append(content)
+                self.metadata.append(metadata)
+                self._doc_terms.append((term_ids, tfs))
+                self._index_document(idx, term_ids, tfs)
+                self._positions[metadata.get("note_id")] = idx
+            self.corpus_version += 1
 
     async def search(self, query: str, k: int = None) -> List[SearchResult]:
         """
@@ -76,24 +244,57 @@ class BM25Retriever(BaseRetriever):
         """
         k = k or ai_config.retriever.top_k
 
-        if not self.bm25 or not self.documents:
-            return []
+        cache_key = (query, k, self.corpus_version)
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-        tokenized_query = self._tokenize(query)
-        scores = self.bm25.get_scores(tokenized_query)
-        scores = self._normalize_scores(scores)
+        # Score off the event loop; NumPy releases the GIL inside its kernels
+        results = await asyncio.to_thread(self._score_sync, query, k)
+        self._search_cache.put(cache_key, results)
+        return results
 
-        # Get top k results
-        top_k_indices = np.argsort(scores)[-k:][::-1]
+    def _score_sync(self, query: str, k: int) -> List[SearchResult]:
+        """
+        Score the corpus for a query and select the top k, bypassing the result cache.
 
-        results: List[SearchResult] = []
-        for idx in top_k_indices:
-            if scores[idx] >= ai_config.retriever.min_score_threshold:
-                results.append(
-                    {"content": self.documents[idx], "metadata": self.metadata[idx], "score": float(scores[idx])}
-                )
+        Runs in a worker thread; holds the index lock so concurrent writes cannot change it mid-scan.
 
-        return results
+        Args:
+            query: Search query
+            k: Number of results to return
+
+        Returns:
+            List[SearchResult]: Search results with scores
+        """
+        tokenized_query = self._tokenize_query(query)
+
+        with self._lock:
+            if not self.documents:
+                return []
+
+            scores = self.get_scores(tokenized_query)
+            max_score = float(scores.max())
+            scores = self._normalize_scores(scores, max_score)
+
+            # After normalization the best score is 1, or 0 when nothing matched;
+            # if even that misses the threshold, skip top-k selection entirely
+            if (1.0 if max_score > 0 else 0.0) < ai_config.retriever.min_score_threshold:
+                return []
+
+            # Get top k results: partition in O(N), then sort only the k survivors
+            k = min(k, scores.size)
+            top_k_indices = np.argpartition(scores, -k)[-k:]
+            top_k_indices = top_k_indices[np.argsort(scores[top_k_indices])[::-1]]
+
+            top_scores = scores[top_k_indices]
+            keep = top_scores >= ai_config.retriever.min_score_threshold
+
+            # tolist() converts indices and scores to Python ints/floats in one C pass
+            return [
+                {"content": self.documents[idx], "metadata": self.metadata[idx], "score": score}
+                for idx, score in zip(top_k_indices[keep].tolist(), top_scores[keep].tolist())
+            ]
 
     async def delete_document(self, doc_id: str) -> None:
         """
@@ -102,16 +303,43 @@ class BM25Retriever(BaseRetriever):
         Args:
             doc_id: Document ID to delete
         """
-        # Find document by ID in metadata
-        for idx, meta in enumerate(self.metadata):
-            if meta.get("note_id") == doc_id:
-                self.documents.pop(idx)
-                self.metadata.pop(idx)
-                self._update_index()
-                break
+        await asyncio.to_thread(self._delete_sync, doc_id)
+
+    def _delete_sync(self, doc_id: str) -> None:
+        """
+        Remove a document from the index; runs in a worker thread.
+
+        Args:
+            doc_id: Document ID to delete
+        """
+        with self._lock:
+            idx = self._positions.pop(doc_id, None)
+            if idx is None:
+                return
+            self._unindex_document(idx)
+            # Fill the hole with the last document so only one document's postings change
+            last = len(self.documents) - 1
+            if idx != last:
+                self._move_document(last, idx)
+            self.documents.pop()
+            self.metadata.pop()
+            self._doc_terms.pop()
+            self._doc_lens[last] = 0
+            self.corpus_version += 1
 
     async def reset(self) -> None:
         """Reset the retriever."""
-        self.documents = []
-        self.metadata = []
-        self.bm25 = None
+        await asyncio.to_thread(self._reset_sync)
+
+    def _reset_sync(self) -> None:
+        """Drop every document from the index; runs in a worker thread."""
+        with self._lock:
+            self.documents = []
+            self.metadata = []
+            self._vocab = {}
+            self._doc_terms = []
+            self._postings = {}
+            self._doc_lens = np.zeros(0, dtype=np.float32)
+            self._total_len = 0
+            self._positions = {}
+            self.corpus_version += 1
@@ -0,0 +1,82 @@
+"""LRU caches used by the retrievers."""
+
+import threading
+from collections import OrderedDict
+from typing import Generic, Hashable, List, Optional, TypeVar
+
+from .base import SearchResult
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """
+    Least-recently-used cache.
+
+    Operations take a lock, since retrievers may read and fill the cache from worker threads.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries kept (0 disables caching)
+        """
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, V] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[V]: Cached value, or None on a miss
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SearchCache(LRUCache[List[SearchResult]]):
+    """
+    LRU cache of search results.
+
+    Callers include the retriever's corpus version in the key, so writes invalidate entries implicitly;
+    stale entries are simply never hit again and age out. Result lists are copied in and out so callers
+    cannot mutate cached entries.
+    """
+
+    def get(self, key: Hashable) -> Optional[List[SearchResult]]:
+        results = super().get(key)
+        return None if results is None else list(results)
+
+    def put(self, key: Hashable, results: List[SearchResult]) -> None:
+        super().put(key, list(results))
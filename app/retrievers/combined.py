@@ -1,81 +1,80 @@
-from typing import List, Dict
+import asyncio
+from typing import List, Dict, Tuple
+
+import numpy as np
 
 from .base import BaseRetriever, SearchResult
 from .bm25 import BM25Retriever
+from .cache import SearchCache
+from .registry import get_retriever
 from .vector import VectorRetriever
+from ..config import get_settings
 from ..config.ai_config import get_ai_config, CombinationMethod
 
+settings = get_settings()
 ai_config = get_ai_config()
 
 
 class CombinedRetriever(BaseRetriever):
     """Combined retriever using either RRF or weighted average."""
 
-    def __init__(self, k0: float = None):
+    def __init__(
+        self,
+        k0: float = None,
+        vector_retriever: VectorRetriever | None = None,
+        bm25_retriever: BM25Retriever | None = None,
+    ):
         """
         Initialize combined retriever.
 
+        Sub-retrievers default to the process-wide shared instances, so every combined retriever
+        sees the same corpus and the embedding model is loaded only once.
+
         Args:
             k0: Optional override for RRF k0 constant
+            vector_retriever: Optional vector retriever to use instead of the shared one
+            bm25_retriever: Optional BM25 retriever to use instead of the shared one
         """
-        self.vector_retriever = VectorRetriever()
-        self.bm25_retriever = BM25Retriever()
+        self.vector_retriever = vector_retriever or get_retriever(
+            ("vector", str(settings.VECTOR_STORE_DIR), ai_config.chroma.collection_name), VectorRetriever
+        )
+        self.bm25_retriever = bm25_retriever or get_retriever(("bm25",), BM25Retriever)
         self.k0 = k0 or ai_config.retriever.rrf_k0
+        self._search_cache = SearchCache(ai_config.retriever.search_cache_size)
+
+    @property
+    def corpus_version(self) -> tuple:
+        """Combined corpus version of both sub-retrievers, which may also be written through other instances."""
+        return (self.vector_retriever.corpus_version, self.bm25_retriever.corpus_version)
 
-    def _compute_rrf_score(self, ranks: Dict[str, List[int]]) -> Dict[str, float]:
+    def _compute_rrf_score(self, ranks: np.ndarray) -> np.ndarray:
         """
         Compute RRF scores for documents based on their ranks in different result sets.
 
         Args:
-            ranks: Dictionary mapping doc_id to list of ranks (one per retriever)
+            ranks: Array of shape (n_docs, n_retrievers) with each document's 1-based rank per retriever
 
         Returns:
-            Dict[str, float]: RRF scores for each document
+            np.ndarray: RRF score for each document
         """
-        rrf_scores = {}
-        for doc_id, doc_ranks in ranks.items():
-            # RRF score = sum(1 / (k0 + r)) for each rank r
-            rrf_score = sum(1 / (self.k0 + r) for r in doc_ranks)
-            rrf_scores[doc_id] = rrf_score
-        return rrf_scores
+        # RRF score = sum(1 / (k0 + r)) for each rank r
+        return (1.0 / (self.k0 + ranks)).sum(axis=1)
 
-    def _compute_weighted_score(self, vector_results: List[dict], bm25_results: List[dict]) -> Dict[str, float]:
+    def _compute_weighted_score(self, scores: np.ndarray) -> np.ndarray:
         """
         Compute weighted average scores for documents.
 
         Args:
-            vector_results: Results from vector retriever
-            bm25_results: Results from BM25 retriever
+            scores: Array of shape (n_docs, n_retrievers) with each document's score per retriever
+                (0 where a retriever did not return the document)
 
         Returns:
-            Dict[str, float]: Weighted scores for each document
+            np.ndarray: Weighted score for each document
         """
-        weighted_scores = {}
-        vector_weight = ai_config.retriever.vector_weight
-        bm25_weight = ai_config.retriever.bm25_weight
-        total_weight = vector_weight + bm25_weight
-
-        if total_weight <= 0:
-            raise ValueError("Total weight must be greater than 0")
-
-        # Normalize weights to sum to 1
-        vector_weight = vector_weight / total_weight
-        bm25_weight = bm25_weight / total_weight
-
-        # Process vector results
-        for result in vector_results:
-            doc_id = result["metadata"]["note_id"]
-            weighted_scores[doc_id] = result["score"] * vector_weight
-
-        # Process BM25 results
-        for result in bm25_results:
-            doc_id = result["metadata"]["note_id"]
-            if doc_id in weighted_scores:
-                weighted_scores[doc_id] += result["score"] * bm25_weight
-            else:
-                weighted_scores[doc_id] = result["score"] * bm25_weight
-
-        return weighted_scores
+        weights = np.array([ai_config.retriever.vector_weight, ai_config.retriever.bm25_weight], dtype=np.float32)
+        # Normalize weights to sum to 1; the total is positive when using weighted average,
+        # enforced once by RetrieverConfig.validate_weights
+        return scores @ (weights / weights.sum())
 
     async def add_document(self, content: str, metadata: dict) -> None:
         """
@@ -88,6 +87,16 @@ class CombinedRetriever(BaseRetriever):
         await self.vector_retriever.add_document(content, metadata)
         await self.bm25_retriever.add_document(content, metadata)
 
+    async def add_documents(self, documents: List[Tuple[str, dict]]) -> None:
+        """
+        Add several documents to both retrievers in one batch each.
+
+        Args:
+            documents: (content, metadata) pairs
+        """
+        await self.vector_retriever.add_documents(documents)
+        await self.bm25_retriever.add_documents(documents)
+
     async def search(self, query: str, k: int = None) -> List[SearchResult]:
         """
         Search using both retrievers and combine results.
@@ -100,61 +109,87 @@ class CombinedRetriever(BaseRetriever):
             List[SearchResult]: Combined search results
         """
         k = k or ai_config.retriever.top_k
+
+        cache_key = (query, k, self.corpus_version)
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        results = await self._search(query, k)
+        self._search_cache.put(cache_key, results)
+        return results
+
+    async def _search(self, query: str, k: int) -> List[SearchResult]:
+        """
+        Search both retrievers and fuse their results, bypassing the result cache.
+
+        Args:
+            query: Search query
+            k: Number of results to return
+
+        Returns:
+            List[SearchResult]: Combined search results
+        """
         search_k = k * 2  # Get more results for better fusion
 
-        # Get results from both retrievers
-        vector_results = await self.vector_retriever.search(query, k=search_k)
-        bm25_results = await self.bm25_retriever.search(query, k=search_k)
+        # Get results from both retrievers concurrently
+        vector_results, bm25_results = await asyncio.gather(
+            self.vector_retriever.search(query, k=search_k),
+            self.bm25_retriever.search(query, k=search_k),
+        )
+
+        # Look each result's id up once; the rank loops below reuse these lists
+        vector_ids = [result["metadata"]["note_id"] for result in vector_results]
+        bm25_ids = [result["metadata"]["note_id"] for result in bm25_results]
+
+        # Map each document to the first result carrying its content/metadata, set exactly once
+        doc_info: Dict[str, SearchResult] = {}
+        for ids, results in ((vector_ids, vector_results), (bm25_ids, bm25_results)):
+            for doc_id, result in zip(ids, results):
+                if doc_id not in doc_info:
+                    doc_info[doc_id] = result
+
+        doc_ids = list(doc_info)
+        position = {doc_id: i for i, doc_id in enumerate(doc_ids)}
 
         # Choose combination method
         if ai_config.retriever.combination_method == CombinationMethod.RRF:
-            # Track ranks for each document
-            ranks: Dict[str, List[int]] = {}
-            content_map: Dict[str, dict] = {}
-
-            # Process vector results
-            for rank, result in enumerate(vector_results):
-                doc_id = result["metadata"]["note_id"]
-                ranks.setdefault(doc_id, []).append(rank + 1)  # 1-based ranking
-                content_map[doc_id] = {"content": result["content"], "metadata": result["metadata"]}
-
-            # Process BM25 results
-            for rank, result in enumerate(bm25_results):
-                doc_id = result["metadata"]["note_id"]
-                ranks.setdefault(doc_id, []).append(rank + 1)  # 1-based ranking
-                content_map[doc_id] = {"content": result["content"], "metadata": result["metadata"]}
-
-            # For documents found by only one retriever, assign a penalty rank
-            max_rank = max(len(vector_results), len(bm25_results))
-            penalty_rank = max_rank + 1
-            for doc_id in ranks:
-                if len(ranks[doc_id]) == 1:
-                    ranks[doc_id].append(penalty_rank)
+            # Documents found by only one retriever keep a penalty rank for the other
+            penalty_rank = max(len(vector_results), len(bm25_results)) + 1
+            ranks = np.full((len(doc_ids), 2), penalty_rank, dtype=np.float32)
+            for rank, doc_id in enumerate(vector_ids, 1):  # 1-based ranking
+                ranks[position[doc_id], 0] = rank
+            for rank, doc_id in enumerate(bm25_ids, 1):
+                ranks[position[doc_id], 1] = rank
 
             # Compute scores
             scores = self._compute_rrf_score(ranks)
-            doc_info = content_map
 
         else:  # Weighted average
-            scores = self._compute_weighted_score(vector_results, bm25_results)
-            # Create content map
-            doc_info = {}
-            for result in vector_results + bm25_results:
-                doc_id = result["metadata"]["note_id"]
-                if doc_id not in doc_info:
-                    doc_info[doc_id] = {"content": result["content"], "metadata": result["metadata"]}
+            # Documents found by only one retriever score 0 for the other
+            raw_scores = np.zeros((len(doc_ids), 2), dtype=np.float32)
+            for doc_id, result in zip(vector_ids, vector_results):
+                raw_scores[position[doc_id], 0] = result["score"]
+            for doc_id, result in zip(bm25_ids, bm25_results):
+                raw_scores[position[doc_id], 1] = result["score"]
 
-        # Create final results
-        results = [
-            {"content": doc_info[doc_id]["content"], "metadata": doc_info[doc_id]["metadata"], "score": score}
-            for doc_id, score in scores.items()
-            if score >= ai_config.retriever.min_score_threshold
+            # Compute scores
+            scores = self._compute_weighted_score(raw_scores)
+
+        # Keep documents above the threshold, then sort them all: there are at most 4k candidates, and a
+        # stable sort keeps ties in insertion order even at the cutoff, where argpartition would pick arbitrarily
+        top = np.flatnonzero(scores >= ai_config.retriever.min_score_threshold)
+        top = top[np.argsort(-scores[top], kind="stable")][:k]
+
+        return [
+            {
+                "content": doc_info[doc_ids[i]]["content"],
+                "metadata": doc_info[doc_ids[i]]["metadata"],
+                "score": score,
+            }
+            for i, score in zip(top.tolist(), scores[top].tolist())
         ]
 
-        # Sort by score and take top k
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:k]
-
     async def delete_document(self, doc_id: str) -> None:
         """
         Delete a document from both retrievers.
@@ -169,3 +204,17 @@ class CombinedRetriever(BaseRetriever):
         """Reset both retrievers."""
         await self.vector_retriever.reset()
         await self.bm25_retriever.reset()
+
+
+def get_combined_retriever(k0: float = None) -> CombinedRetriever:
+    """
+    Get the shared combined retriever for the current configuration.
+
+    Args:
+        k0: Optional override for RRF k0 constant
+
+    Returns:
+        CombinedRetriever: Shared combined retriever instance
+    """
+    k0 = k0 or ai_config.retriever.rrf_k0
+    return get_retriever(("combined", str(settings.VECTOR_STORE_DIR), k0), lambda: CombinedRetriever(k0=k0))
@@ -0,0 +1,277 @@
+"""Embedding backends for the vector retriever."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """Embeddings computed in-process by a sentence-transformers model, L2-normalized."""
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        backend: str = "torch",
+        model_file: str | None = None,
+        batch_size: int = 64,
+    ):
+        """
+        Load the model.
+
+        Args:
+            model_name: sentence-transformers model name or path
+            device: Device to run on (cpu/cuda)
+            backend: Inference backend (torch/onnx/openvino)
+            model_file: Exported model file to load for the onnx/openvino backend
+            batch_size: Number of texts per forward pass
+        """
+        # Imported lazily: torch costs hundreds of ms and is only needed once a retriever is built
+        from sentence_transformers import SentenceTransformer
+
+        model_kwargs = {"file_name": model_file} if model_file else None
+        self.model = SentenceTransformer(model_name, device=device, backend=backend, model_kwargs=model_kwargs)
+        self.batch_size = batch_size
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts into unit-length vectors, so Chroma's cosine distance is a plain dot product.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            np.ndarray: Array of shape (len(texts), dim)
+        """
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List[List[float]]: One embedding per text
+        """
+        return self._encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a search query.
+
+        Args:
+            text: Query text
+
+        Returns:
+            List[float]: Query embedding
+        """
+        return self._encode([text])[0].tolist()
+
+
+class TEIEmbeddings(Embeddings):
+    """Embeddings served by a Text-Embeddings-Inference (TEI) server over HTTP."""
+
+    def __init__(
+        self,
+        base_url: str,
+        batch_size: int = 32,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        transport: httpx.BaseTransport | None = None,
+    ):
+        """
+        Initialize the TEI client.
+
+        Args:
+            base_url: Base URL of the TEI server (e.g. http://tei:80)
+            batch_size: Maximum number of texts per request (TEI rejects batches above its client limit)
+            timeout: Request timeout in seconds
+            max_retries: Number of retries on connection errors and 5xx responses
+            backoff: Initial retry delay in seconds, doubled on every attempt
+            transport: Optional httpx transport (e.g. a mock in tests)
+        """
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # One pooled client shared by all calls; embedding runs in worker threads, so it is synchronous
+        self._client = httpx.Client(base_url=base_url, timeout=timeout, transport=transport)
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        POST one batch of texts to the TEI /embed endpoint, retrying transient failures.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List[List[float]]: One embedding per text
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._client.post("/embed", json={"inputs": texts, "truncate": True})
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return response.json()
+                error: Exception = httpx.HTTPStatusError(
+                    f"TEI returned {response.status_code}", request=response.request, response=response
+                )
+            except httpx.TransportError as e:
+                error = e
+            if attempt == self.max_retries:
+                raise error
+            time.sleep(self.backoff * 2**attempt)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents, splitting them into batches the server accepts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List[List[float]]: One embedding per text
+        """
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            embeddings.extend(self._embed(texts[start : start + self.batch_size]))
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a search query.
+
+        Args:
+            text: Query text
+
+        Returns:
+            List[float]: Query embedding
+        """
+        return self._embed([text])[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-addressed cache of document embeddings, persisted in SQLite.
+
+    Documents are keyed by the SHA-256 of their text together with a model key, so re-adding
+    identical content skips the model entirely and switching models never returns stale vectors.
+    Queries are passed through; the vector retriever keeps its own in-memory query cache.
+
+    Entries are never tied to notes, so deleting a note leaves its vector cached; instead the cache
+    holds at most max_entries vectors and evicts the least recently inserted ones beyond that.
+    """
+
+    # SQLite's default limit on bound parameters is 999
+    _SELECT_CHUNK = 500
+
+    def __init__(self, embeddings: Embeddings, model_key: str, path: Path, max_entries: int = 100_000):
+        """
+        Initialize the cache, creating its table if needed.
+
+        Args:
+            embeddings: Embeddings used for cache misses
+            model_key: Identifies the model producing the vectors (cached vectors of other models are ignored)
+            path: SQLite database file
+            max_entries: Maximum number of vectors kept, across all models
+        """
+        self.embeddings = embeddings
+        self.model_key = model_key
+        self.max_entries = max_entries
+        # Embedding runs in worker threads, so the connection is shared across threads behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                "model TEXT NOT NULL, hash BLOB NOT NULL, dim INTEGER NOT NULL, vec BLOB NOT NULL, "
+                "PRIMARY KEY (model, hash))"
+            )
+            # Counted once here and then tracked, so inserts don't pay for a COUNT(*) scan
+            (self._size,) = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()
+
+    def _lookup(self, hashes: List[bytes]) -> Dict[bytes, List[float]]:
+        """
+        Fetch cached vectors for the given content hashes.
+
+        Args:
+            hashes: Content hashes to look up
+
+        Returns:
+            Dict[bytes, List[float]]: Cached vector per hash found
+        """
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), self._SELECT_CHUNK):
+                chunk = hashes[start : start + self._SELECT_CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT hash, vec FROM embedding_cache WHERE model = ? AND hash IN ({placeholders})",
+                    [self.model_key, *chunk],
+                )
+                for digest, vec in rows:
+                    found[digest] = np.frombuffer(vec, dtype=np.float32).tolist()
+        return found
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents, running the model only for content not embedded before.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List[List[float]]: One embedding per text
+        """
+        hashes = [hashlib.sha256(text.encode()).digest() for text in texts]
+        vectors = self._lookup(list(set(hashes)))
+
+        # Embed each missing text once, even if it repeats within the batch
+        missing = {digest: text for digest, text in zip(hashes, texts) if digest not in vectors}
+        if missing:
+            embedded = self.embeddings.embed_documents(list(missing.values()))
+            rows = []
+            for digest, vector in zip(missing, embedded):
+                array = np.asarray(vector, dtype=np.float32)
+                vectors[digest] = array.tolist()
+                rows.append((self.model_key, digest, array.size, array.tobytes()))
+            with self._lock, self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO embedding_cache VALUES (?, ?, ?, ?)", rows)
+                self._size += len(rows)
+                if self._size > self.max_entries:
+                    # Rowids grow with every insert, so the smallest ones are the oldest entries
+                    self._conn.execute(
+                        "DELETE FROM embedding_cache WHERE rowid IN "
+                        "(SELECT rowid FROM embedding_cache ORDER BY rowid LIMIT ?)",
+                        (self._size - self.max_entries,),
+                    )
+                    self._size = self.max_entries
+
+        return [vectors[digest] for digest in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a search query.
+
+        Args:
+            text: Query text
+
+        Returns:
+            List[float]: Query embedding
+        """
+        return self.embeddings.embed_query(text)
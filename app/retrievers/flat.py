@@ -0,0 +1,130 @@
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class FlatIndex:
+    """
+    Exact nearest-neighbour index over unit vectors held in one contiguous float32 matrix.
+
+    Search is a single matrix-vector product plus a partial sort, which for the corpus sizes of a
+    notes app beats walking an HNSW graph and is exact. Rows are kept dense: a delete moves the
+    last row into the freed slot. All operations take a lock, since callers run in worker threads.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((0, 0), dtype=np.float32)  # Capacity rows; the first _size are live
+        self._size = 0
+        self._ids: List[str] = []
+        self._documents: List[Tuple[str, dict]] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, rows: int, dim: int) -> None:
+        """
+        Make room for at least `rows` vectors of dimension `dim`.
+
+        Args:
+            rows: Required number of rows
+            dim: Vector dimension
+        """
+        capacity, current_dim = self._vectors.shape
+        if current_dim != dim and self._size == 0:
+            self._vectors = np.zeros((0, dim), dtype=np.float32)
+            capacity = 0
+        if rows > capacity:
+            # Grow geometrically so appends stay amortized O(1)
+            grown = np.zeros((max(rows, 2 * capacity), dim), dtype=np.float32)
+            grown[: self._size] = self._vectors[: self._size]
+            self._vectors = grown
+
+    def add(self, ids: List[str], vectors: np.ndarray, documents: List[Tuple[str, dict]]) -> None:
+        """
+        Add documents, replacing any already indexed under the same id.
+
+        Args:
+            ids: Document ids
+            vectors: Array of shape (len(ids), dim)
+            documents: (content, metadata) per id
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.size == 0:
+            return
+        # Normalize once here so search is a plain dot product
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            self._reserve(self._size + len(ids), vectors.shape[1])
+            for doc_id, vector, document in zip(ids, vectors, documents):
+                row = self._positions.get(doc_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._positions[doc_id] = row
+                    self._ids.append(doc_id)
+                    self._documents.append(document)
+                else:
+                    self._documents[row] = document
+                self._vectors[row] = vector
+
+    def remove(self, doc_id: str) -> None:
+        """
+        Remove a document if it is indexed.
+
+        Args:
+            doc_id: Document id
+        """
+        with self._lock:
+            row = self._positions.pop(doc_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                # Fill the hole with the last row so the live rows stay contiguous
+                self._vectors[row] = self._vectors[last]
+                self._ids[row] = self._ids[last]
+                self._documents[row] = self._documents[last]
+                self._positions[self._ids[row]] = row
+            self._ids.pop()
+            self._documents.pop()
+            self._size = last
+
+    def clear(self) -> None:
+        """Remove all documents."""
+        with self._lock:
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            self._size = 0
+            self._ids = []
+            self._documents = []
+            self._positions = {}
+
+    def search(self, query: List[float], k: int) -> List[Tuple[str, dict, float]]:
+        """
+        Find the k documents most similar to a query vector.
+
+        Args:
+            query: Query embedding
+            k: Number of results to return
+
+        Returns:
+            List[Tuple[str, dict, float]]: (content, metadata, cosine similarity), best first
+        """
+        query = np.asarray(query, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        with self._lock:
+            if self._size == 0:
+                return []
+            scores = self._vectors[: self._size] @ query
+
+            # Partition in O(N), then sort only the k survivors
+            k = min(k, self._size)
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            return [(*self._documents[row], score) for row, score in zip(top.tolist(), scores[top].tolist())]
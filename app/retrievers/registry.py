@@ -0,0 +1,42 @@
+"""Process-wide registry of shared retriever instances."""
+
+import threading
+from typing import Callable, Dict, Hashable, TypeVar
+
+from .base import BaseRetriever
+
+R = TypeVar("R", bound=BaseRetriever)
+
+_registry: Dict[Hashable, BaseRetriever] = {}
+# Reentrant, because a factory may itself get shared retrievers (the combined one gets the vector and BM25 ones)
+_lock = threading.RLock()
+
+
+def get_retriever(key: Hashable, factory: Callable[[], R]) -> R:
+    """
+    Get the shared retriever registered under a key, constructing it on first use.
+
+    Uses double-checked locking so the common path (already constructed) is a plain dict lookup.
+    The factory runs under the lock, so each retriever (and its model) is built exactly once.
+
+    Args:
+        key: Identifies the retriever configuration
+        factory: Builds the retriever when none is registered yet
+
+    Returns:
+        R: Shared retriever instance
+    """
+    retriever = _registry.get(key)
+    if retriever is None:
+        with _lock:
+            retriever = _registry.get(key)
+            if retriever is None:
+                retriever = factory()
+                _registry[key] = retriever
+    return retriever
+
+
+def clear_registry() -> None:
+    """Drop all shared retrievers, e.g. after the vector store directory changes."""
+    with _lock:
+        _registry.clear()
@@ -1,30 +1,180 @@
-from typing import List
-
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+import asyncio
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
 
 from ..config import get_settings
-from ..config.ai_config import get_ai_config
+from ..config.ai_config import EmbeddingsConfig, get_ai_config
 from .base import BaseRetriever, SearchResult
+from .cache import LRUCache, SearchCache
+from .flat import FlatIndex
 
 settings = get_settings()
 ai_config = get_ai_config()
+logger = logging.getLogger(__name__)
+
+# Chroma distance per unit of cosine similarity lost, for unit vectors: cosine and ip report 1 - cos,
+# squared L2 (Chroma's default space) reports 2 - 2 cos
+_DISTANCE_PER_SIMILARITY = {"cosine": 1.0, "ip": 1.0, "l2": 2.0}
+
+
+@lru_cache(maxsize=4)
+def get_embeddings(config: EmbeddingsConfig):
+    """
+    Get the embedding backend for a configuration, loading the model only once per process.
+
+    Document embeddings go through the persistent content-hash cache unless it is disabled.
+
+    Args:
+        config: Embeddings configuration (frozen, so it can key the cache)
+
+    Returns:
+        Embeddings: Embedding function shared by every retriever using this configuration
+    """
+    embeddings = _create_embeddings(config)
+    if not config.document_cache:
+        return embeddings
+
+    from .embeddings import CachedEmbeddings
+
+    # Everything that changes the vectors goes into the key, so a model switch never reuses stale entries
+    if config.tei_url:
+        model_key = f"tei:{config.tei_url}"
+    else:
+        model_key = f"{config.model_name}:{config.backend}:{config.model_file}"
+    return CachedEmbeddings(
+        embeddings, model_key, settings.EMBEDDING_CACHE_PATH, max_entries=config.document_cache_size
+    )
+
+
+def _create_embeddings(config: EmbeddingsConfig):
+    """
+    Create the embedding backend: a TEI server when configured, otherwise an in-process model.
+
+    Args:
+        config: Embeddings configuration
+
+    Returns:
+        Embeddings: Embedding function computing every vector
+    """
+    from .embeddings import SentenceTransformerEmbeddings, TEIEmbeddings
+
+    if config.tei_url:
+        return TEIEmbeddings(base_url=config.tei_url, batch_size=config.batch_size)
+
+    return SentenceTransformerEmbeddings(
+        model_name=config.model_name,
+        device=config.device,
+        backend=config.backend,
+        model_file=config.model_file,
+        batch_size=config.batch_size,
+    )
 
 
 class VectorRetriever(BaseRetriever):
     """Vector store retriever implementation."""
 
-    def __init__(self):
-        """Initialize vector store with HuggingFace embeddings."""
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=ai_config.embeddings.model_name,
-            model_kwargs={"device": ai_config.embeddings.device},
-        )
-        self.store = Chroma(
+    def __init__(self, persist_directory: Path | None = None, client: Any = None):
+        """
+        Initialize vector store with sentence-transformers or TEI embeddings.
+
+        Args:
+            persist_directory: Optional override for the Chroma directory (defaults to settings value)
+            client: Optional Chroma client to use instead of opening persist_directory, e.g. an in-memory one
+        """
+        self.persist_directory = persist_directory or settings.VECTOR_STORE_DIR
+        self.client = client
+        self.embeddings = get_embeddings(ai_config.embeddings)
+        self.store = self._create_store()
+        # Chroma stays the store of record; the flat index mirrors its vectors for exact search
+        self._flat = FlatIndex() if ai_config.chroma.exact_search else None
+        self._load_flat_index()
+        self._query_embeddings: LRUCache[List[float]] = LRUCache(ai_config.embeddings.query_cache_size)
+        self._search_cache = SearchCache(ai_config.retriever.search_cache_size)
+        # The model already uses every core for one call; more concurrent calls only thrash its thread pool
+        self._embedding_slots = asyncio.Semaphore(ai_config.embeddings.max_concurrency)
+
+    def _create_store(self):
+        """
+        Open the Chroma collection backing this retriever.
+
+        Chroma (>= 0.4) writes through to persist_directory on every add/delete, so no explicit
+        persist() is needed. A client passed to the constructor takes precedence over the directory.
+
+        Returns:
+            Chroma: Vector store using this retriever's embeddings
+        """
+        from langchain_community.vectorstores import Chroma
+
+        store = Chroma(
             collection_name=ai_config.chroma.collection_name,
             embedding_function=self.embeddings,
-            persist_directory=str(settings.VECTOR_STORE_DIR),
+            persist_directory=None if self.client is not None else str(self.persist_directory),
+            client=self.client,
+            # Only applied when the collection is created; an existing collection keeps its settings
+            collection_metadata={
+                "hnsw:space": "cosine",
+                "hnsw:M": ai_config.chroma.hnsw_m,
+                "hnsw:construction_ef": ai_config.chroma.hnsw_construction_ef,
+                "hnsw:search_ef": ai_config.chroma.hnsw_search_ef,
+            },
+        )
+
+        # Collections created before cosine became the default keep their space; scores are converted for it
+        self._space = (store._collection.metadata or {}).get("hnsw:space", "l2")
+        if self._space != "cosine":
+            logger.warning(
+                "Chroma collection %r uses %s distance instead of cosine and ignores the configured HNSW "
+                "parameters; delete %s and re-add the notes to rebuild it",
+                ai_config.chroma.collection_name,
+                self._space,
+                self.persist_directory,
+            )
+        return store
+
+    def _load_flat_index(self) -> None:
+        """Fill the flat index, if enabled, with every vector in the collection."""
+        if self._flat is None:
+            return
+        self._flat.clear()
+        data = self.store.get(include=["embeddings", "documents", "metadatas"])
+        if data["ids"]:
+            self._flat.add(data["ids"], data["embeddings"], list(zip(data["documents"], data["metadatas"])))
+
+    def _add_sync(self, documents: List[Tuple[str, dict]]) -> None:
+        """
+        Embed and store documents, mirroring their vectors into the flat index if enabled.
+
+        Args:
+            documents: (content, metadata) pairs
+        """
+        ids = [metadata["note_id"] for _, metadata in documents]
+        self.store.add_texts(
+            texts=[content for content, _ in documents],
+            metadatas=[metadata for _, metadata in documents],
+            ids=ids,
         )
+        if self._flat is not None:
+            # Read the stored vectors back rather than embedding twice
+            data = self.store.get(ids=ids, include=["embeddings"])
+            vectors = dict(zip(data["ids"], data["embeddings"]))
+            self._flat.add(ids, [vectors[doc_id] for doc_id in ids], documents)
+
+    async def _run_embedding(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking call that embeds text in a worker thread, bounding how many run at once.
+
+        Args:
+            func: Blocking callable
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Any: Return value of func
+        """
+        async with self._embedding_slots:
+            return await asyncio.to_thread(func, *args, **kwargs)
 
     async def add_document(self, content: str, metadata: dict) -> None:
         """
@@ -34,8 +184,68 @@ class VectorRetriever(BaseRetriever):
             content: Document content
             metadata: Document metadata
         """
-        self.store.add_texts(texts=[content], metadatas=[metadata], ids=[metadata["note_id"]])
-        self.store.persist()
+        try:
+            # Embedding and the Chroma write block, so keep them off the event loop
+            await self._run_embedding(self._add_sync, [(content, metadata)])
+        finally:
+            # Even a failed write may have stored part of the documents, so cached results are stale either way
+            self.corpus_version += 1
+
+    async def add_documents(self, documents: List[Tuple[str, dict]]) -> None:
+        """
+        Add several documents, embedding them in batches.
+
+        Args:
+            documents: (content, metadata) pairs
+        """
+        if not documents:
+            return
+        batch_size = ai_config.embeddings.batch_size
+        try:
+            for start in range(0, len(documents), batch_size):
+                await self._run_embedding(self._add_sync, documents[start : start + batch_size])
+        finally:
+            # Earlier batches are stored even if a later one fails
+            self.corpus_version += 1
+
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """
+        Collapse whitespace, which never changes the model's tokens, so such variants share cache entries.
+
+        Args:
+            query: Search query
+
+        Returns:
+            str: Normalized query
+        """
+        return " ".join(query.split())
+
+    def _embed_query(self, query: str) -> List[float]:
+        """
+        Embed a normalized query, reusing the embedding of a previously seen query.
+
+        Args:
+            query: Normalized search query
+
+        Returns:
+            List[float]: Query embedding
+        """
+        embedding = self._query_embeddings.get(query)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+            self._query_embeddings.put(query, embedding)
+        return embedding
+
+    async def warmup(self, queries: List[str]) -> None:
+        """
+        Embed queries ahead of time so their first search skips the model.
+
+        Args:
+            queries: Search queries expected to be asked
+        """
+        for query in queries:
+            await self._run_embedding(self._embed_query, self._normalize_query(query))
 
     async def search(self, query: str, k: int = None) -> List[SearchResult]:
         """
@@ -49,15 +259,48 @@ class VectorRetriever(BaseRetriever):
             List[SearchResult]: Search results with scores
         """
         k = k or ai_config.retriever.top_k
-        results = self.store.similarity_search_with_score(query=query, k=k)
+        query = self._normalize_query(query)
+
+        # Repeated queries skip both the embedding and the HNSW walk until the next write
+        cache_key = (query, k, self.corpus_version)
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Embedding and Chroma lookup block, so run them off the event loop to overlap with BM25 scoring
+        results = await self._run_embedding(self._search_sync, query, k)
+        self._search_cache.put(cache_key, results)
+        return results
+
+    def _search_sync(self, query: str, k: int) -> List[SearchResult]:
+        """
+        Embed the query and look up its nearest documents.
+
+        Args:
+            query: Search query
+            k: Number of results to return
+
+        Returns:
+            List[SearchResult]: Search results with scores
+        """
+        embedding = self._embed_query(query)
+        if self._flat is not None:
+            return [
+                {"content": content, "metadata": metadata, "score": round(score, 4)}
+                for content, metadata, score in self._flat.search(embedding, k)
+            ]
+
+        results = self.store.similarity_search_by_vector_with_relevance_scores(embedding=embedding, k=k)
+        distance_per_similarity = _DISTANCE_PER_SIMILARITY[self._space]
 
         return [
             {
                 "content": doc.page_content,
                 "metadata": doc.metadata,
-                "score": round(score, 4),
+                # Cosine similarity, higher is better
+                "score": round(1.0 - distance / distance_per_similarity, 4),
             }
-            for doc, score in results
+            for doc, distance in results
         ]
 
     async def delete_document(self, doc_id: str) -> None:
@@ -67,14 +310,17 @@ class VectorRetriever(BaseRetriever):
         Args:
             doc_id: Document ID to delete
         """
-        self.store.delete(ids=[doc_id])
-        self.store.persist()
+        try:
+            await asyncio.to_thread(self.store.delete, ids=[doc_id])
+            if self._flat is not None:
+                self._flat.remove(doc_id)
+        finally:
+            self.corpus_version += 1
 
     async def reset(self) -> None:
-        """Reset the retriever."""
-        self.store = Chroma(
-            collection_name=ai_config.chroma.collection_name,
-            embedding_function=self.embeddings,
-            persist_directory=str(settings.VECTOR_STORE_DIR),
-        )
-        self.store.persist()
+        """Reset the retriever, dropping every stored document."""
+        await asyncio.to_thread(self.store.delete_collection)
+        self.store = self._create_store()
+        await asyncio.to_thread(self._load_flat_index)
+        # Query embeddings depend only on the model, so they stay valid for the new collection
+        self.corpus_version += 1
@@ -1,11 +1,14 @@
-from typing import List
+import json
+from functools import lru_cache
+from typing import Any, AsyncIterator, List, Tuple
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import async_session
-from ..retrievers.combined import CombinedRetriever
+from ..retrievers.combined import get_combined_retriever
 from ..schemas import NoteCreate, NoteRead
 from ..services.note import NoteService
 
@@ -18,9 +21,15 @@ async def get_db():
         yield session
 
 
+@lru_cache
+def _shared_note_service() -> NoteService:
+    """Build the note service shared by all requests, so concurrent creates are indexed in one batch."""
+    return NoteService(get_combined_retriever())
+
+
 async def get_note_service():
     """Get note service instance."""
-    return NoteService(CombinedRetriever())
+    return _shared_note_service()
 
 
 @router.post("/", response_model=NoteRead)
@@ -43,6 +52,26 @@ async def create_note(
     return await note_service.create_note(db, note_data)
 
 
+@router.post("/bulk", response_model=List[NoteRead])
+async def create_notes_bulk(
+    notes_data: List[NoteCreate],
+    db: AsyncSession = Depends(get_db),
+    note_service: NoteService = Depends(get_note_service),
+) -> List[NoteRead]:
+    """
+    Create several notes at once.
+
+    Args:
+        notes_data: Note data to create
+        db: Database session
+        note_service: Note service instance
+
+    Returns:
+        List[NoteRead]: Created notes
+    """
+    return await note_service.create_notes_bulk(db, notes_data)
+
+
 @router.get("/", response_model=List[NoteRead])
 async def get_notes(
     db: AsyncSession = Depends(get_db),
@@ -151,3 +180,39 @@ async def generate_response(
         dict: Generated response and source contexts
     """
     return await note_service.generate_response(query, k)
+
+
+async def _server_sent_events(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[str]:
+    """
+    Format (event, data) pairs as server-sent events with JSON data.
+
+    Args:
+        events: Event name and payload pairs
+
+    Yields:
+        str: One server-sent event per pair
+    """
+    async for event, data in events:
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/answer")
+async def stream_answer(
+    query: str,
+    k: int = 4,
+    note_service: NoteService = Depends(get_note_service),
+) -> StreamingResponse:
+    """
+    Stream a response to a query, using relevant notes as context, as it is generated.
+
+    Args:
+        query: User's query
+        k: Number of relevant notes to use as context
+        note_service: Note service instance
+
+    Returns:
+        StreamingResponse: Server-sent events: one "sources" event, then "token" events with text chunks
+    """
+    return StreamingResponse(
+        _server_sent_events(note_service.stream_response(query, k)), media_type="text/event-stream"
+    )
@@ -0,0 +1,64 @@
+import asyncio
+from typing import List, Tuple
+
+from ..retrievers.base import BaseRetriever
+
+
+class IndexBatcher:
+    """
+    Coalesces concurrent document adds into batched retriever writes.
+
+    Each caller still waits until its own document is indexed, so a note is searchable as soon as
+    its create request returns. While one batch is being embedded, documents from other requests
+    queue up and go into the next add_documents call together, so no caller waits on a timer.
+    """
+
+    def __init__(self, retriever: BaseRetriever, max_batch: int = 32):
+        """
+        Initialize the batcher.
+
+        Args:
+            retriever: Retriever to index documents into
+            max_batch: Maximum number of documents per add_documents call
+        """
+        self.retriever = retriever
+        self.max_batch = max_batch
+        self._pending: List[Tuple[str, dict, asyncio.Future]] = []
+        self._worker: asyncio.Task | None = None
+
+    async def add_document(self, content: str, metadata: dict) -> None:
+        """
+        Queue a document and wait until it has been indexed.
+
+        Args:
+            content: Document content
+            metadata: Document metadata
+
+        Raises:
+            Exception: Whatever the retriever raised while indexing the batch holding this document
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((content, metadata, future))
+        if self._worker is None:
+            self._worker = loop.create_task(self._drain())
+        await future
+
+    async def _drain(self) -> None:
+        """Index queued documents batch by batch until the queue is empty."""
+        try:
+            while self._pending:
+                batch = self._pending[: self.max_batch]
+                del self._pending[: self.max_batch]
+                try:
+                    await self.retriever.add_documents([(content, metadata) for content, metadata, _ in batch])
+                except Exception as e:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_result(None)
+        finally:
+            self._worker = None
@@ -1,17 +1,18 @@
-from typing import Dict, List, Optional
-from uuid import UUID
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
 
-from openai import AsyncOpenAI
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import get_settings
 from ..config.ai_config import get_ai_config
-from ..config.prompts import REGENERATION_PROMPT, RELEVANCY_CHECK_PROMPT
+from ..config.prompts import ANSWER_PROMPT, REGENERATION_PROMPT, RELEVANCY_CHECK_PROMPT
 from ..models import Note
 from ..retrievers.base import BaseRetriever
-from ..retrievers.combined import CombinedRetriever
+from ..retrievers.combined import CombinedRetriever, get_combined_retriever
 from ..schemas import NoteCreate
+from .indexing import IndexBatcher
 
 settings = get_settings()
 ai_config = get_ai_config()
@@ -22,7 +23,11 @@ class NoteService:
 
     def __init__(self, retriever: Optional[BaseRetriever] = None):
         """Initialize with retriever instance."""
-        self.retriever = retriever or CombinedRetriever(k0=ai_config.retriever.rrf_k0)
+        # Imported lazily: the openai SDK takes ~0.5 s to import and is not needed until a service is built
+        from openai import AsyncOpenAI
+
+        self.retriever = retriever or get_combined_retriever()
+        self._indexer = IndexBatcher(self.retriever)
         self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
 
     async def create_note(self, db: AsyncSession, note_data: NoteCreate) -> Note:
@@ -36,17 +41,63 @@ class NoteService:
         Returns:
             Note: Created note
         """
-        # Create note in database
-        note = Note(**note_data.model_dump())
+        # The id is assigned up front so indexing does not have to wait for the insert
+        note = Note(id=uuid4(), **note_data.model_dump())
         db.add(note)
+        metadata = {"note_id": str(note.id), "title": note.title}
+
+        # Commit and index concurrently; indexing is batched with notes created concurrently
+        committed, indexed = await asyncio.gather(
+            self._commit_note(db, note),
+            self._indexer.add_document(note.content, metadata),
+            return_exceptions=True,
+        )
+        if isinstance(committed, BaseException):
+            # Don't leave a search hit for a note that was never saved
+            if not isinstance(indexed, BaseException):
+                await self.retriever.delete_document(metadata["note_id"])
+            raise committed
+        if isinstance(indexed, BaseException):
+            raise indexed
+
+        return note
+
+    @staticmethod
+    async def _commit_note(db: AsyncSession, note: Note) -> None:
+        """
+        Commit a new note and load its server-generated columns.
+
+        Args:
+            db: Database session
+            note: Note added to the session
+        """
         await db.commit()
         await db.refresh(note)
 
-        # Add to retrievers
-        metadata = {"note_id": str(note.id), "title": note.title}
-        await self.retriever.add_document(note.content, metadata)
+    async def create_notes_bulk(self, db: AsyncSession, notes_data: List[NoteCreate]) -> List[Note]:
+        """
+        Create several notes in one transaction and add them to retrievers in one batch.
 
-        return note
+        Args:
+            db: Database session
+            notes_data: Note data to create
+
+        Returns:
+            List[Note]: Created notes, in input order
+        """
+        notes = [Note(**note_data.model_dump()) for note_data in notes_data]
+        db.add_all(notes)
+        await db.flush()
+        note_ids = [note.id for note in notes]
+        await db.commit()
+        # Reload server-generated columns for all notes with one query rather than a refresh per note
+        await db.execute(select(Note).where(Note.id.in_(note_ids)))
+
+        await self.retriever.add_documents(
+            [(note.content, {"note_id": str(note.id), "title": note.title}) for note in notes]
+        )
+
+        return notes
 
     async def get_notes(self, db: AsyncSession) -> List[Note]:
         """
@@ -61,6 +112,49 @@ class NoteService:
         result = await db.execute(select(Note))
         return list(result.scalars().all())
 
+    async def iter_notes(self, db: AsyncSession) -> AsyncIterator[Note]:
+        """
+        Iterate over all notes without loading the whole table at once.
+
+        Args:
+            db: Database session
+
+        Yields:
+            Note: Each note, fetched from a server-side cursor in chunks
+        """
+        async for note in await db.stream_scalars(select(Note).execution_options(yield_per=500)):
+            yield note
+
+    async def load_keyword_index(self, db: AsyncSession, batch_size: int = 500) -> int:
+        """
+        Fill an empty BM25 index with every stored note.
+
+        The BM25 index lives in memory and starts empty in every process, while Chroma persists the
+        vectors, so only the keyword side needs rebuilding after a restart.
+
+        Args:
+            db: Database session
+            batch_size: Number of notes per add_documents call
+
+        Returns:
+            int: Number of notes indexed (0 if the index was not empty)
+        """
+        if not isinstance(self.retriever, CombinedRetriever) or self.retriever.bm25_retriever.documents:
+            return 0
+
+        count = 0
+        batch: List[Tuple[str, dict]] = []
+        async for note in self.iter_notes(db):
+            batch.append((note.content, {"note_id": str(note.id), "title": note.title}))
+            if len(batch) == batch_size:
+                await self.retriever.bm25_retriever.add_documents(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            await self.retriever.bm25_retriever.add_documents(batch)
+            count += len(batch)
+        return count
+
     async def get_note(self, db: AsyncSession, note_id: UUID) -> Optional[Note]:
         """
         Get a note by ID.
@@ -172,58 +266,65 @@ class NoteService:
 
         return response.choices[0].message.content
 
-    async def generate_response(self, query: str, k: int = None) -> Dict[str, str]:
+    async def _prepare_answer(self, query: str, k: int = None) -> Tuple[Optional[str], List[dict], List[dict]]:
         """
-        Generate a response to a query using relevant notes as context.
+        Retrieve context for a query and build the chat messages to answer it.
 
         Args:
             query: User's query
             k: Number of relevant notes to use as context (defaults to config value)
 
         Returns:
-            Dict[str, str]: Dictionary containing the response and sources
+            Tuple[Optional[str], List[dict], List[dict]]: Fallback response when no usable context was found
+            (None otherwise), the chat messages, and the sources used as context
         """
         # Get relevant notes
         k = k or ai_config.retriever.top_k
         search_results = await self.search_notes(query, k)
 
         if not search_results:
-            return {"response": "I couldn't find any relevant information to answer your query.", "sources": []}
+            return "I couldn't find any relevant information to answer your query.", [], []
 
         # Prepare context from search results
-        contexts = []
-        sources = []
-        for result in search_results:
-            if result["score"] >= ai_config.retriever.min_score_threshold:
-                contexts.append(result["content"])
-                sources.append({"content": result["content"], "metadata": result["metadata"]})
-
-        if not contexts:
-            return {
-                "response": "I couldn't find any sufficiently relevant information to answer your query.",
-                "sources": [],
-            }
+        threshold = ai_config.retriever.min_score_threshold
+        relevant = [result for result in search_results if result["score"] >= threshold]
+        if not relevant:
+            return "I couldn't find any sufficiently relevant information to answer your query.", [], []
+
+        sources = [{"content": result["content"], "metadata": result["metadata"]} for result in relevant]
+
+        # Create prompt with context, bulleted in a single join
+        contexts = "- " + "\n- ".join(result["content"] for result in relevant)
+        prompt = ANSWER_PROMPT.format(contexts=contexts, query=query)
+
+        messages = [
+            {
+                "role": "system",
+                "content": ai_config.openai.system_prompt,
+            },
+            {"role": "user", "content": prompt},
+        ]
+        return None, messages, sources
 
-        # Create prompt with context
-        prompt = f"""Based on the following contexts, answer the query. If the contexts don't contain relevant information answer to the best of your ability but tell the user that you couldn't find relevant information.
-
-Contexts:
-{chr(10).join(f'- {context}' for context in contexts)}
+    async def generate_response(self, query: str, k: int = None) -> Dict[str, str]:
+        """
+        Generate a response to a query using relevant notes as context.
 
-Query: {query}
+        Args:
+            query: User's query
+            k: Number of relevant notes to use as context (defaults to config value)
 
-Please provide a clear and concise response using the information from the given contexts and if you don't have relevant information answer to the best of your ability but tell the user that you couldn't find relevant information."""
+        Returns:
+            Dict[str, str]: Dictionary containing the response and sources
+        """
+        fallback, messages, sources = await self._prepare_answer(query, k)
+        if fallback is not None:
+            return {"response": fallback, "sources": []}
 
         # Generate initial response
         response = await self.openai_client.chat.completions.create(
             model=ai_config.openai.model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": ai_config.openai.system_prompt,
-                },
-                {"role": "user", "content": prompt},
-            ],
+            messages=messages,
             temperature=ai_config.openai.temperature,
             max_tokens=ai_config.openai.max_tokens,
         )
@@ -231,6 +332,7 @@ Please provide a clear and concise response using the information from the given
         initial_response = response.choices[0].message.content
 
         # # Check response quality - rerank rag
+        # contexts = [source["content"] for source in sources]
         # is_good_response = await self._check_response_quality(query, contexts, initial_response)
         # for _ in range(5):
         #     if not is_good_response:
@@ -244,3 +346,33 @@ Please provide a clear and concise response using the information from the given
         #         break
 
         return {"response": initial_response, "sources": sources}
+
+    async def stream_response(self, query: str, k: int = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a response to a query as it is generated, using relevant notes as context.
+
+        The sources are sent first, so clients can show them while the answer is still being generated.
+
+        Args:
+            query: User's query
+            k: Number of relevant notes to use as context (defaults to config value)
+
+        Yields:
+            Tuple[str, Any]: ("sources", list of sources) once, then ("token", text chunk) events
+        """
+        fallback, messages, sources = await self._prepare_answer(query, k)
+        yield "sources", sources
+        if fallback is not None:
+            yield "token", fallback
+            return
+
+        stream = await self.openai_client.chat.completions.create(
+            model=ai_config.openai.model,
+            messages=messages,
+            temperature=ai_config.openai.temperature,
+            max_tokens=ai_config.openai.max_tokens,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield "token", chunk.choices[0].delta.content
@@ -1,13 +1,22 @@
 import asyncio
 from typing import AsyncGenerator
 import os
+import shutil
+import tempfile
 from pathlib import Path
 
-import pytest
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+# Point everything the app persists at a scratch directory before any app module reads its settings,
+# so the tests never write into data/
+APP_DATA_DIR = Path(tempfile.mkdtemp(prefix="memory-note-app-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{APP_DATA_DIR}/notes.db"
+os.environ["VECTOR_STORE_DIR"] = str(APP_DATA_DIR / "vector_store")
+os.environ["EMBEDDING_CACHE_PATH"] = str(APP_DATA_DIR / "embedding_cache.db")
 
-from app.database import Base
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+
+from app.database import Base  # noqa: E402
 
 # Create a test data directory
 TEST_DIR = Path(__file__).parent / "test_data"
@@ -17,6 +26,11 @@ TEST_DIR.mkdir(exist_ok=True)
 TEST_DATABASE_URL = f"sqlite+aiosqlite:///{TEST_DIR}/test.db"
 
 
+def pytest_sessionfinish(session, exitstatus):
+    """Remove the scratch directory holding the app's data."""
+    shutil.rmtree(APP_DATA_DIR, ignore_errors=True)
+
+
 @pytest.fixture(scope="session")
 def event_loop():
     """Create an instance of the default event loop for each test case."""
@@ -30,6 +44,15 @@ async def engine():
     """Create a test database engine."""
     engine = create_async_engine(TEST_DATABASE_URL, echo=False)
 
+    # The sqlite3 driver defers BEGIN and breaks SAVEPOINTs; let SQLAlchemy emit BEGIN itself
+    @event.listens_for(engine.sync_engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
@@ -49,9 +72,17 @@ async def engine():
 
 @pytest.fixture
 async def db(engine) -> AsyncGenerator[AsyncSession, None]:
-    """Get a test database session."""
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-
-    async with async_session() as session:
-        yield session
-        await session.rollback()
+    """
+    Get a test database session whose changes are rolled back after the test.
+
+    The session runs inside an outer transaction; its commits only release savepoints, so the
+    rollback undoes everything without recreating tables.
+    """
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, expire_on_commit=False, join_transaction_mode="create_savepoint")
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
@@ -0,0 +1,16 @@
+import pytest
+from pydantic import ValidationError
+
+from app.config.ai_config import CombinationMethod, RetrieverConfig
+
+
+def test_weighted_retriever_config_requires_positive_weight():
+    """Test that weighted fusion is rejected when both weights are zero."""
+    with pytest.raises(ValidationError, match="At least one weight"):
+        RetrieverConfig(combination_method=CombinationMethod.WEIGHTED, vector_weight=0.0, bm25_weight=0.0)
+
+
+def test_rrf_retriever_config_allows_zero_weights():
+    """Test that weights are not checked when using RRF."""
+    config = RetrieverConfig(combination_method=CombinationMethod.RRF, vector_weight=0.0, bm25_weight=0.0)
+    assert config.combination_method == CombinationMethod.RRF
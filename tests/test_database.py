@@ -0,0 +1,26 @@
+from uuid import uuid4
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import convert_legacy_note_ids
+from app.models import Note
+
+
+async def test_legacy_hex_note_ids_are_readable_and_converted(db: AsyncSession):
+    """Test that notes stored with hex string ids can be read, and are found by id once converted."""
+    note_id = uuid4()
+    await db.execute(
+        text("INSERT INTO notes (id, title, content) VALUES (:id, 'Old note', 'Written before blob ids')"),
+        {"id": note_id.hex},
+    )
+
+    notes = (await db.execute(select(Note))).scalars().all()
+    assert [note.id for note in notes] == [note_id]
+
+    connection = await db.connection()
+    assert await connection.run_sync(convert_legacy_note_ids) == 1
+
+    db.expunge_all()
+    note = (await db.execute(select(Note).where(Note.id == note_id))).scalar_one()
+    assert note.title == "Old note"
@@ -0,0 +1,98 @@
+import hashlib
+import json
+from typing import List
+
+import httpx
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.retrievers.embeddings import CachedEmbeddings, TEIEmbeddings
+
+
+def test_cached_embeddings_embed_each_content_once(tmp_path):
+    """Test that the embedding cache only runs the model for content it has not seen."""
+
+    class CountingEmbeddings(Embeddings):
+        def __init__(self):
+            self.embedded: List[str] = []
+
+        def embed_documents(self, texts: List[str]) -> List[List[float]]:
+            self.embedded.extend(texts)
+            return [[float(len(text)), 1.0] for text in texts]
+
+        def embed_query(self, text: str) -> List[float]:
+            return [float(len(text)), 1.0]
+
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, "test-model", tmp_path / "embeddings.db")
+
+    assert cache.embed_documents(["a", "bb", "a"]) == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert cache.embed_documents(["bb", "ccc"]) == [[2.0, 1.0], [3.0, 1.0]]
+    assert model.embedded == ["a", "bb", "ccc"]
+
+    # Vectors of another model are never reused
+    CachedEmbeddings(model, "other-model", tmp_path / "embeddings.db").embed_documents(["a"])
+    assert model.embedded == ["a", "bb", "ccc", "a"]
+
+
+def test_cached_embeddings_evict_oldest_beyond_max_entries(tmp_path):
+    """Test that the embedding cache stays bounded and drops the oldest vectors first."""
+
+    class LengthEmbeddings(Embeddings):
+        def embed_documents(self, texts: List[str]) -> List[List[float]]:
+            return [[float(len(text))] for text in texts]
+
+        def embed_query(self, text: str) -> List[float]:
+            return [float(len(text))]
+
+    cache = CachedEmbeddings(LengthEmbeddings(), "test-model", tmp_path / "embeddings.db", max_entries=2)
+    cache.embed_documents(["a", "bb"])
+    cache.embed_documents(["ccc"])
+
+    cached = cache._lookup([hashlib.sha256(text.encode()).digest() for text in ["a", "bb", "ccc"]])
+    assert sorted(cached.values()) == [[2.0], [3.0]]
+
+    # The size is tracked across connections too
+    reopened = CachedEmbeddings(LengthEmbeddings(), "test-model", tmp_path / "embeddings.db", max_entries=2)
+    assert reopened._size == 2
+
+
+def test_tei_embeddings_batch_and_retry_server_errors():
+    """Test that TEI requests are split into batches and retried on 5xx and connection errors."""
+    requests = []
+    failures = [httpx.ConnectError("connection refused"), 503]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        inputs = json.loads(request.content)["inputs"]
+        requests.append(inputs)
+        if failures:
+            failure = failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return httpx.Response(failure)
+        return httpx.Response(200, json=[[float(len(text))] for text in inputs])
+
+    embeddings = TEIEmbeddings("http://tei", batch_size=2, backoff=0.0, transport=httpx.MockTransport(handler))
+
+    assert embeddings.embed_documents(["a", "bb", "ccc"]) == [[1.0], [2.0], [3.0]]
+    # The first batch succeeds on its third attempt; the second batch goes through at once
+    assert requests == [["a", "bb"], ["a", "bb"], ["a", "bb"], ["ccc"]]
+
+
+def test_tei_embeddings_do_not_retry_client_errors():
+    """Test that 4xx responses are raised at once, and 5xx responses once retries run out."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(413 if len(calls) == 1 else 500)
+
+    embeddings = TEIEmbeddings("http://tei", max_retries=2, backoff=0.0, transport=httpx.MockTransport(handler))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        embeddings.embed_query("too long")
+    assert len(calls) == 1
+
+    with pytest.raises(httpx.HTTPStatusError):
+        embeddings.embed_query("server down")
+    assert len(calls) == 4
@@ -0,0 +1,19 @@
+import numpy as np
+
+from app.retrievers.flat import FlatIndex
+
+
+def test_flat_index_delete_keeps_rows_consistent():
+    """Test that the flat index stays searchable after deletes move rows around."""
+    index = FlatIndex()
+    index.add(
+        ["a", "b", "c"],
+        np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]),
+        [("first", {"note_id": "a"}), ("second", {"note_id": "b"}), ("third", {"note_id": "c"})],
+    )
+
+    index.remove("a")
+
+    results = index.search([1.0, 0.1], k=2)
+    assert [metadata["note_id"] for _, metadata, _ in results] == ["c", "b"]
+    assert len(index) == 2
@@ -0,0 +1,16 @@
+import asyncio
+
+from app.retrievers import BM25Retriever
+from app.services.indexing import IndexBatcher
+
+
+async def test_index_batcher_coalesces_concurrent_adds():
+    """Test that concurrent adds are indexed in one batch and searchable once each add returns."""
+    bm25_retriever = BM25Retriever()
+    indexer = IndexBatcher(bm25_retriever)
+    version = bm25_retriever.corpus_version
+
+    await asyncio.gather(*(indexer.add_document(f"note number {i}", {"note_id": str(i)}) for i in range(5)))
+
+    assert bm25_retriever.corpus_version == version + 1
+    assert len(await bm25_retriever.search("note", k=10)) == 5
@@ -1,42 +1,35 @@
-from uuid import UUID
-import shutil
+import asyncio
+import threading
+import time
+from uuid import UUID, uuid4
 from pathlib import Path
 from typing import List
 
+import chromadb
+import numpy as np
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config.ai_config import get_ai_config
 from app.models import Note
 from app.retrievers import BM25Retriever, CombinedRetriever, VectorRetriever
 from app.schemas import NoteCreate
 from app.services.note import NoteService
 
+ai_config = get_ai_config()
 
-@pytest.fixture
-async def vector_retriever(tmp_path):
-    """Create a temporary vector retriever for testing."""
-    from app.config import get_settings
-
-    settings = get_settings()
 
-    # Create test directories
-    test_dir = tmp_path / "test_data"
-    test_dir.mkdir(exist_ok=True)
-    vector_store_dir = test_dir / "test_vector_store"
-    vector_store_dir.mkdir(exist_ok=True)
+@pytest.fixture(scope="session")
+def shared_vector_retriever():
+    """Create one in-memory vector retriever for the whole session, so nothing is written to disk."""
+    return VectorRetriever(client=chromadb.EphemeralClient())
 
-    # Override settings for testing
-    settings.VECTOR_STORE_DIR = vector_store_dir
 
-    retriever = VectorRetriever()
-    yield retriever
-
-    # Cleanup: Delete the temporary test directory
-    try:
-        retriever.store._collection = None  # Close Chroma collection
-        shutil.rmtree(test_dir)
-    except Exception as e:
-        print(f"Warning: Failed to cleanup test directory: {e}")
+@pytest.fixture
+async def vector_retriever(shared_vector_retriever):
+    """Provide the shared vector retriever, emptied before each test."""
+    await shared_vector_retriever.reset()
+    return shared_vector_retriever
 
 
 @pytest.fixture
@@ -48,10 +41,7 @@ async def bm25_retriever():
 @pytest.fixture
 async def combined_retriever(vector_retriever, bm25_retriever):
     """Create a combined retriever for testing."""
-    retriever = CombinedRetriever()
-    retriever.vector_retriever = vector_retriever
-    retriever.bm25_retriever = bm25_retriever
-    return retriever
+    return CombinedRetriever(vector_retriever=vector_retriever, bm25_retriever=bm25_retriever)
 
 
 @pytest.fixture
@@ -60,7 +50,7 @@ async def note_service(combined_retriever):
     return NoteService(combined_retriever)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def sample_notes_data():
     """Sample notes data for testing."""
     return [
@@ -79,6 +69,26 @@ async def sample_notes_data():
     ]
 
 
+@pytest.fixture(scope="session")
+async def prepopulated_note_service(tmp_path_factory, sample_notes_data):
+    """
+    Create a note service whose retrievers already hold the sample notes.
+
+    The notes are embedded and indexed once for the whole session; tests using this fixture must only read from it.
+    """
+    vector_store_dir = tmp_path_factory.mktemp("prepopulated_vector_store")
+    retriever = CombinedRetriever(
+        vector_retriever=VectorRetriever(persist_directory=vector_store_dir), bm25_retriever=BM25Retriever()
+    )
+    await retriever.add_documents(
+        [(note_data.content, {"note_id": str(uuid4()), "title": note_data.title}) for note_data in sample_notes_data]
+    )
+    await retriever.vector_retriever.warmup(
+        ["artificial intelligence", "python programming language", "AI and Python", ""]
+    )
+    return NoteService(retriever)
+
+
 async def test_create_note(note_service: NoteService, db: AsyncSession, sample_notes_data: List[NoteCreate]):
     """Test creating a note."""
     note = await note_service.create_note(db, sample_notes_data[0])
@@ -89,14 +99,10 @@ async def test_create_note(note_service: NoteService, db: AsyncSession, sample_n
     assert note.content == sample_notes_data[0].content
 
 
-async def test_vector_search(note_service: NoteService, db: AsyncSession, sample_notes_data: List[NoteCreate]):
+async def test_vector_search(prepopulated_note_service: NoteService):
     """Test vector search functionality."""
-    # Create test notes
-    for note_data in sample_notes_data:
-        await note_service.create_note(db, note_data)
-
     # Search for AI-related content
-    results = await note_service.retriever.vector_retriever.search("artificial intelligence")
+    results = await prepopulated_note_service.retriever.vector_retriever.search("artificial intelligence")
 
     assert len(results) > 0
     # The ML note should be most relevant
@@ -104,14 +110,10 @@ async def test_vector_search(note_service: NoteService, db: AsyncSession, sample
     assert all(isinstance(result["score"], float) for result in results)
 
 
-async def test_bm25_search(note_service: NoteService, db: AsyncSession, sample_notes_data: List[NoteCreate]):
+async def test_bm25_search(prepopulated_note_service: NoteService):
     """Test BM25 search functionality."""
-    # Create test notes
-    for note_data in sample_notes_data:
-        await note_service.create_note(db, note_data)
-
     # Search for Python-related content
-    results = await note_service.retriever.bm25_retriever.search("python programming language")
+    results = await prepopulated_note_service.retriever.bm25_retriever.search("python programming language")
 
     assert len(results) > 0
     # The Python note should be most relevant
@@ -119,14 +121,10 @@ async def test_bm25_search(note_service: NoteService, db: AsyncSession, sample_n
     assert all(isinstance(result["score"], float) for result in results)
 
 
-async def test_combined_search(note_service: NoteService, db: AsyncSession, sample_notes_data: List[NoteCreate]):
+async def test_combined_search(prepopulated_note_service: NoteService):
     """Test combined search functionality."""
-    # Create test notes
-    for note_data in sample_notes_data:
-        await note_service.create_note(db, note_data)
-
     # Search that should benefit from both vector and keyword matching
-    results = await note_service.search_notes("AI and Python")
+    results = await prepopulated_note_service.search_notes("AI and Python")
 
     assert len(results) > 0
     # Should find both AI and Python related notes
@@ -156,14 +154,34 @@ async def test_delete_note(note_service: NoteService, db: AsyncSession, sample_n
     assert not any(r["metadata"]["note_id"] == str(note.id) for r in bm25_results)
 
 
-async def test_search_empty_query(note_service: NoteService, db: AsyncSession, sample_notes_data: List[NoteCreate]):
-    """Test searching with empty query."""
-    # Create test notes
-    for note_data in sample_notes_data:
-        await note_service.create_note(db, note_data)
+async def test_create_notes_bulk(note_service: NoteService, db: AsyncSession, sample_notes_data: List[NoteCreate]):
+    """Test creating several notes at once."""
+    notes = await note_service.create_notes_bulk(db, sample_notes_data)
 
+    assert [note.title for note in notes] == [note_data.title for note_data in sample_notes_data]
+    assert all(note.created_at is not None for note in notes)
+
+    results = await note_service.retriever.bm25_retriever.search("python programming language")
+    assert any(r["metadata"]["note_id"] == str(notes[1].id) for r in results)
+
+
+async def test_load_keyword_index(note_service: NoteService, db: AsyncSession, sample_notes_data: List[NoteCreate]):
+    """Test that the BM25 index is rebuilt from the database, e.g. after a restart."""
+    notes = await note_service.create_notes_bulk(db, sample_notes_data)
+    await note_service.retriever.bm25_retriever.reset()
+
+    assert await note_service.load_keyword_index(db) == len(notes)
+    results = await note_service.retriever.bm25_retriever.search("python programming language")
+    assert any(r["metadata"]["note_id"] == str(notes[1].id) for r in results)
+
+    # An index that already holds documents is left alone
+    assert await note_service.load_keyword_index(db) == 0
+
+
+async def test_search_empty_query(prepopulated_note_service: NoteService):
+    """Test searching with empty query."""
     # Search with empty query
-    results = await note_service.search_notes("")
+    results = await prepopulated_note_service.search_notes("")
 
     # Should return results but with very low scores
     assert len(results) > 0
@@ -174,3 +192,99 @@ async def test_search_no_results(note_service: NoteService, db: AsyncSession):
     """Test searching with no matching results."""
     results = await note_service.search_notes("completely unrelated query xyzabc")
     assert len(results) == 0
+
+
+async def test_vector_scores_are_cosine_similarity_in_legacy_l2_collection(tmp_path):
+    """Test that a collection created with Chroma's default L2 space still reports cosine similarities."""
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    client.create_collection(ai_config.chroma.collection_name, metadata={"hnsw:space": "l2"})
+    retriever = VectorRetriever(client=client)
+    contents = ["python web framework", "neural networks for image recognition"]
+    await retriever.add_documents([(content, {"note_id": str(i)}) for i, content in enumerate(contents)])
+
+    results = await retriever.search("python web framework", k=2)
+
+    query = np.asarray(retriever.embeddings.embed_query("python web framework"))
+    expected = {content: float(query @ np.asarray(retriever.embeddings.embed_query(content))) for content in contents}
+    assert {r["content"]: r["score"] for r in results} == pytest.approx(expected, abs=1e-3)
+
+
+async def test_vector_failed_add_invalidates_cached_results(vector_retriever: VectorRetriever, monkeypatch):
+    """Test that documents stored by a write that then fails are not hidden by cached search results."""
+    assert await vector_retriever.search("python web framework") == []
+
+    add_sync = vector_retriever._add_sync
+
+    def add_then_fail(documents):
+        add_sync(documents)
+        raise RuntimeError("write failed after storing the documents")
+
+    monkeypatch.setattr(vector_retriever, "_add_sync", add_then_fail)
+    with pytest.raises(RuntimeError):
+        await vector_retriever.add_documents([("python web framework", {"note_id": "a"})])
+
+    results = await vector_retriever.search("python web framework")
+    assert [r["metadata"]["note_id"] for r in results] == ["a"]
+
+
+async def test_bm25_delete_keeps_index_consistent(bm25_retriever: BM25Retriever):
+    """Test that deleting a document leaves the remaining documents searchable."""
+    await bm25_retriever.add_document("python web framework", {"note_id": "a"})
+    await bm25_retriever.add_document("neural networks in python", {"note_id": "b"})
+    await bm25_retriever.add_document("react frontend framework", {"note_id": "c"})
+
+    await bm25_retriever.delete_document("a")
+
+    results = await bm25_retriever.search("framework")
+    assert [r["metadata"]["note_id"] for r in results] == ["c"]
+
+    results = await bm25_retriever.search("python")
+    assert [r["metadata"]["note_id"] for r in results] == ["b"]
+
+    # "c" was moved into the freed slot and must still be found by id
+    await bm25_retriever.delete_document("c")
+    assert await bm25_retriever.search("framework") == []
+    assert [r["metadata"]["note_id"] for r in await bm25_retriever.search("python")] == ["b"]
+
+
+async def test_bm25_write_waits_for_the_lock_off_the_event_loop(bm25_retriever: BM25Retriever):
+    """Test that a write arriving while a search holds the index lock does not block the event loop."""
+    locked = threading.Event()
+
+    def search_in_progress():
+        with bm25_retriever._lock:
+            locked.set()
+            time.sleep(0.2)
+
+    thread = threading.Thread(target=search_in_progress)
+    thread.start()
+    locked.wait()
+
+    write = asyncio.create_task(bm25_retriever.add_document("python web framework", {"note_id": "a"}))
+    ticks = 0
+    while not write.done():
+        await asyncio.sleep(0.01)
+        ticks += 1
+    thread.join()
+
+    assert ticks > 5
+    assert len(await bm25_retriever.search("python")) == 1
+
+
+async def test_bm25_search_cache_invalidated_on_write(bm25_retriever: BM25Retriever):
+    """Test that cached search results are not served after the corpus changes."""
+    await bm25_retriever.add_document("python web framework", {"note_id": "a"})
+    assert len(await bm25_retriever.search("python")) == 1
+
+    await bm25_retriever.add_document("python data science", {"note_id": "b"})
+    assert len(await bm25_retriever.search("python")) == 2
+
+
+async def test_bm25_add_documents_batch(bm25_retriever: BM25Retriever):
+    """Test that batch-added documents are indexed like individually added ones."""
+    await bm25_retriever.add_documents(
+        [("python web framework", {"note_id": "a"}), ("neural networks in python", {"note_id": "b"})]
+    )
+
+    results = await bm25_retriever.search("neural networks")
+    assert [r["metadata"]["note_id"] for r in results] == ["b"]
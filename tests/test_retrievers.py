@@ -0,0 +1,90 @@
+import threading
+from typing import List
+
+import pytest
+
+from app.config.ai_config import CombinationMethod
+from app.retrievers import BaseRetriever, CombinedRetriever, SearchResult, get_combined_retriever
+from app.retrievers import combined
+
+
+class StaticRetriever(BaseRetriever):
+    """Retriever returning fixed results, so fusion can be tested without a model."""
+
+    def __init__(self, note_ids: List[str], scores: List[float] | None = None):
+        scores = scores or [1.0] * len(note_ids)
+        self.results: List[SearchResult] = [
+            {"content": f"note {note_id}", "metadata": {"note_id": note_id}, "score": score}
+            for note_id, score in zip(note_ids, scores)
+        ]
+
+    async def add_document(self, content: str, metadata: dict) -> None:
+        raise NotImplementedError
+
+    async def search(self, query: str, k: int = 4) -> List[SearchResult]:
+        return self.results[:k]
+
+    async def delete_document(self, doc_id: str) -> None:
+        raise NotImplementedError
+
+    async def reset(self) -> None:
+        raise NotImplementedError
+
+
+def use_retriever_config(monkeypatch, **updates):
+    """Override retriever settings as seen by CombinedRetriever for one test (the config itself is frozen)."""
+    config = combined.ai_config
+    retriever_config = config.retriever.model_copy(update=updates)
+    monkeypatch.setattr(combined, "ai_config", config.model_copy(update={"retriever": retriever_config}))
+
+
+def test_get_combined_retriever_is_shared():
+    """Test that the shared combined retriever is built once, without deadlocking on its sub-retrievers."""
+    built = []
+    # Built in a thread so a deadlock fails the test instead of hanging the suite
+    thread = threading.Thread(target=lambda: built.append(get_combined_retriever()), daemon=True)
+    thread.start()
+    thread.join(timeout=300)
+
+    assert built, "get_combined_retriever() did not return"
+    assert get_combined_retriever() is built[0]
+
+
+async def test_rrf_ties_keep_insertion_order(monkeypatch):
+    """Test that documents with equal RRF scores are returned in the order they were first seen."""
+    use_retriever_config(monkeypatch, combination_method=CombinationMethod.RRF)
+    retriever = CombinedRetriever(
+        vector_retriever=StaticRetriever(["a", "b", "c"]), bm25_retriever=StaticRetriever(["d", "e", "f"])
+    )
+
+    results = await retriever.search("query", k=4)
+
+    assert [r["metadata"]["note_id"] for r in results] == ["a", "d", "b", "e"]
+
+
+async def test_rrf_ties_at_the_cutoff_keep_insertion_order(monkeypatch):
+    """Test that when tied documents straddle the k cutoff, the first seen ones are kept."""
+    use_retriever_config(monkeypatch, combination_method=CombinationMethod.RRF)
+    retriever = CombinedRetriever(
+        vector_retriever=StaticRetriever([f"v{i}" for i in range(6)]),
+        bm25_retriever=StaticRetriever([f"b{i}" for i in range(6)]),
+    )
+
+    assert [r["metadata"]["note_id"] for r in await retriever.search("query", k=1)] == ["v0"]
+    assert [r["metadata"]["note_id"] for r in await retriever.search("query", k=3)] == ["v0", "b0", "v1"]
+    assert [r["metadata"]["note_id"] for r in await retriever.search("query", k=5)] == ["v0", "b0", "v1", "b1", "v2"]
+
+
+async def test_weighted_fusion_scores(monkeypatch):
+    """Test weighted fusion of a document found by both retrievers and documents found by only one."""
+    use_retriever_config(monkeypatch, combination_method=CombinationMethod.WEIGHTED, vector_weight=0.7, bm25_weight=0.3)
+    retriever = CombinedRetriever(
+        vector_retriever=StaticRetriever(["a", "b"], [0.9, 0.5]),
+        bm25_retriever=StaticRetriever(["b", "c"], [1.0, 0.4]),
+    )
+
+    results = await retriever.search("query", k=3)
+
+    assert [r["metadata"]["note_id"] for r in results] == ["b", "a", "c"]
+    assert [r["score"] for r in results] == pytest.approx([0.7 * 0.5 + 0.3 * 1.0, 0.7 * 0.9, 0.3 * 0.4])
+    assert all(isinstance(r["score"], float) for r in results)
@@ -0,0 +1,107 @@
+import json
+from types import SimpleNamespace
+from typing import Any, List, Optional, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.retrievers import BM25Retriever
+from app.routes.notes import get_note_service
+from app.services.note import NoteService
+
+
+class FakeCompletions:
+    """Stands in for openai_client.chat.completions, streaming fixed chunks."""
+
+    def __init__(self, chunks: List[Optional[str]]):
+        self.chunks = chunks
+        self.calls: List[dict] = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+
+        async def stream():
+            for content in self.chunks:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+            # The final chunk of a stream may carry no choices at all
+            yield SimpleNamespace(choices=[])
+
+        return stream()
+
+
+@pytest.fixture
+def answer_stub(monkeypatch):
+    """Put a note service with stubbed search results and OpenAI stream behind the API."""
+    search_results: List[dict] = []
+    completions = FakeCompletions(["Tomatoes", None, " need\nsun", ""])
+
+    async def search_notes(query: str, k: int = None) -> List[dict]:
+        return search_results
+
+    service = NoteService(BM25Retriever())
+    monkeypatch.setattr(service, "search_notes", search_notes)
+    service.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    app.dependency_overrides[get_note_service] = lambda: service
+    yield SimpleNamespace(search_results=search_results, completions=completions)
+    app.dependency_overrides.pop(get_note_service)
+
+
+def parse_server_sent_events(body: str) -> List[Tuple[str, Any]]:
+    """Split a server-sent event stream into (event, JSON data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event_line, data_line = block.split("\n")
+        events.append((event_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))))
+    return events
+
+
+def test_note_lifecycle_through_api():
+    """Test creating, listing, searching and deleting a note through the API with the real dependencies."""
+    with TestClient(app) as client:
+        note = {"title": "Gardening", "content": "Tomatoes need plenty of sun and regular watering."}
+        response = client.post("/api/v1/notes/", json=note)
+        assert response.status_code == 200
+        note_id = response.json()["id"]
+
+        response = client.get("/api/v1/notes/")
+        assert response.status_code == 200
+        assert note_id in [note["id"] for note in response.json()]
+
+        response = client.post("/api/v1/notes/search", params={"query": "tomatoes watering"})
+        assert response.status_code == 200
+        assert any(result["metadata"]["note_id"] == note_id for result in response.json())
+
+        assert client.delete(f"/api/v1/notes/{note_id}").status_code == 200
+        assert client.get(f"/api/v1/notes/{note_id}").status_code == 404
+
+
+def test_answer_streams_sources_then_tokens(answer_stub: SimpleNamespace):
+    """Test that the answer stream sends the sources first, then one JSON event per non-empty token."""
+    answer_stub.search_results.append(
+        {"content": "Tomatoes need sun.", "metadata": {"note_id": "a", "title": "Garden"}, "score": 0.9}
+    )
+
+    response = TestClient(app).post("/api/v1/notes/answer", params={"query": "what do tomatoes need?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert parse_server_sent_events(response.text) == [
+        ("sources", [{"content": "Tomatoes need sun.", "metadata": {"note_id": "a", "title": "Garden"}}]),
+        ("token", "Tomatoes"),
+        ("token", " need\nsun"),
+    ]
+    (call,) = answer_stub.completions.calls
+    assert call["stream"] is True
+    assert "Tomatoes need sun." in call["messages"][-1]["content"]
+
+
+def test_answer_streams_fallback_without_results(answer_stub: SimpleNamespace):
+    """Test that the answer stream falls back to a fixed message, without calling OpenAI, when nothing is found."""
+    response = TestClient(app).post("/api/v1/notes/answer", params={"query": "what do tomatoes need?"})
+
+    assert parse_server_sent_events(response.text) == [
+        ("sources", []),
+        ("token", "I couldn't find any relevant information to answer your query."),
+    ]
+    assert answer_stub.completions.calls == []